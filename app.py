@@ -2,16 +2,19 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import os # Tambahkan import os untuk debugging path
+import os
 
 # Import modul-modul yang kita buat
-from preprocessing import load_data, preprocess_data
+from preprocessing import load_data, DataPreprocessor
 from modeling import train_regression_model, make_regression_prediction
-from clustering import categorize_price, plot_price_categories_distribution
-from utilitas import plot_feature_importance, plot_residuals
+from registry import get_model_registry
+from tuning import tune_regression_model
+from eda_cache import get_eda_artifacts
+from clustering import categorize_price, fit_price_segments, render_price_categories_distribution
+from utilitas import render_feature_importance, render_residuals
+from instrumentation import capture_stages, enable_memory_tracking, summarize, to_prometheus
+from reporting import set_reporter
+from prediction_cache import get_prediction_cache, model_version
 
 def main():
     st.set_page_config(layout="wide", page_title="Prediksi Harga Rumah")
@@ -21,6 +24,7 @@ def main():
     # --- Sidebar untuk Navigasi dan Konfigurasi ---
     st.sidebar.title("Navigasi")
     page = st.sidebar.radio("Pilih Halaman", ["Beranda", "Eksplorasi Data", "Modeling Regresi", "Kategorisasi Harga", "Tentang"])
+    st.sidebar.checkbox("Tampilkan Panel Performa", key='show_perf_panel')
 
     # Memuat data dari file Excel
     df = load_data('data_rumah.xlsx') # Pastikan nama file sesuai
@@ -31,9 +35,11 @@ def main():
         initial_dtypes = df.dtypes
         # --- Akhir ambil informasi sebelum preprocessing ---
 
-        # Lakukan pra-pemrosesan data
-        df_processed, scaler_fitted = preprocess_data(df.copy())
-        st.session_state['data_scaler'] = scaler_fitted # Simpan scaler di session state
+        # Lakukan pra-pemrosesan data (preprocessor disimpan untuk dipakai ulang pada data baru)
+        preprocessor = DataPreprocessor()
+        df_processed = preprocessor.fit_transform(df)
+        st.session_state['preprocessor'] = preprocessor
+        st.session_state['data_scaler'] = preprocessor.scaler_ # Simpan scaler di session state
 
         # --- Ambil informasi setelah preprocessing untuk display cleaning ---
         processed_missing_values = df_processed.isnull().sum()
@@ -101,23 +107,19 @@ def main():
             st.write("---") # Garis pemisah
             # --- AKHIR BAGIAN BARU ---
 
+            # Ringkasan & gambar dihitung sekali per isi data hasil pra-pemrosesan, lalu diambil dari cache
+            # (kunci dari df_processed, sehingga perubahan file maupun pra-pemrosesan ikut membatalkan cache)
+            eda_artifacts = get_eda_artifacts(df_processed)
+
             st.subheader("Statistik Deskriptif")
-            st.write(df_processed.describe())
+            st.write(eda_artifacts['describe'])
 
-            st.subheader("Distribusi Harga Rumah")
-            fig, ax = plt.subplots(figsize=(10, 6))
-            sns.histplot(df_processed['harga'], kde=True, ax=ax)
-            ax.set_title('Distribusi Harga Rumah')
-            ax.set_xlabel('Harga (Rupiah)')
-            ax.set_ylabel('Frekuensi')
-            st.pyplot(fig)
+            if 'price_histogram_image' in eda_artifacts:
+                st.subheader("Distribusi Harga Rumah")
+                st.image(eda_artifacts['price_histogram_image'])
 
             st.subheader("Korelasi Antar Fitur Numerik")
-            fig, ax = plt.subplots(figsize=(12, 10))
-            numeric_cols = df_processed.select_dtypes(include=np.number).columns
-            sns.heatmap(df_processed[numeric_cols].corr(), annot=True, cmap='coolwarm', fmt=".2f", ax=ax)
-            ax.set_title('Matriks Korelasi Fitur')
-            st.pyplot(fig)
+            st.image(eda_artifacts['corr_image'])
 
         elif page == "Modeling Regresi":
             st.header("📈 Modeling Regresi (Prediksi Harga)")
@@ -133,9 +135,14 @@ def main():
             if st.button("Latih Model Regresi"):
                 with st.spinner("Melatih model..."):
                     if 'harga' in df_processed.columns:
-                        model, X_test_global, y_test, y_pred, metrics = train_regression_model(df_processed, test_size, random_state)
+                        # Model dengan data & parameter yang sama langsung diambil dari registry
+                        model, X_test_global, y_test, y_pred, metrics = train_regression_model(
+                            df_processed, test_size, random_state,
+                            registry=get_model_registry(), preprocessor=preprocessor,
+                        )
                         st.session_state['trained_model'] = model
                         st.session_state['X_test_columns'] = X_test_global.columns.tolist()
+                        st.session_state['model_preprocessor'] = preprocessor
                         st.success("Model berhasil dilatih!")
 
                         st.subheader("Metrik Evaluasi Model")
@@ -145,26 +152,34 @@ def main():
                         st.write(f"RMSE (Root Mean Squared Error): **Rp {metrics['rmse']:.2f}**")
 
                         st.subheader("Visualisasi Prediksi")
-                        fig_res = plot_residuals(y_test, y_pred)
-                        st.pyplot(fig_res)
+                        # Plot dirender di render pool (tanpa pyplot) dan di-cache sebagai PNG
+                        st.image(render_residuals(y_test, y_pred))
 
                         if model is not None and hasattr(model, 'feature_importances_'):
-                            fig_fi = plot_feature_importance(model, X_test_global.columns)
-                            st.pyplot(fig_fi)
+                            st.image(render_feature_importance(model, X_test_global.columns))
                         else:
                             st.info("Model yang digunakan tidak memiliki atribut feature_importances_.")
                     else:
                         st.error("Kolom 'harga' tidak ditemukan di data yang diproses. Pastikan data Anda memiliki kolom harga yang valid.")
 
+            with st.expander("Tuning Hyperparameter (K-Fold Cross-Validation)"):
+                st.write("Mencari kombinasi hyperparameter Random Forest terbaik secara paralel dengan *successive halving*.")
+                cv_folds = st.slider("Jumlah Fold", 3, 10, 5)
+                n_candidates = st.slider("Jumlah Kandidat (Randomized Search)", 5, 50, 15)
+                if st.button("Jalankan Tuning"):
+                    with st.spinner("Menjalankan tuning hyperparameter..."):
+                        _, best_params, leaderboard = tune_regression_model(
+                            df_processed, n_iter=n_candidates, cv=cv_folds, random_state=random_state, refit=False,
+                        )
+                    st.success(f"Parameter terbaik: {best_params}")
+                    st.dataframe(leaderboard)
+
             st.subheader("Buat Prediksi Harga Rumah Baru")
             st.write("Masukkan nilai fitur untuk memprediksi harga rumah.")
             st.info("Pastikan Anda sudah melatih model regresi terlebih dahulu di atas.")
 
-            feature_cols_for_pred = st.session_state.get('X_test_columns', [
-                'luas_tanah_m2', 'luas_bangunan_m2', 'jumlah_kamar_tidur',
-                'jumlah_kamar_mandi', 'jumlah_lantai', 'carport', 'listrik_va'
-            ])
-
+            # Input memakai nama kolom data mentah (setelah pembersihan nama kolom),
+            # sehingga bisa langsung di-transform oleh preprocessor hasil fit.
             input_features_dict = {}
             st.write("---")
             st.markdown("### Masukkan Detail Rumah Baru:")
@@ -172,26 +187,39 @@ def main():
 
             with col1:
                 input_features_dict['luas_tanah_m2'] = st.number_input("Luas Tanah (m²)", min_value=10, max_value=2000, value=100)
-                input_features_dict['jumlah_kamar_tidur'] = st.slider("Jumlah Kamar Tidur", 1, 6, 3)
-                input_features_dict['jumlah_lantai'] = st.slider("Jumlah Lantai", 1, 5, 1)
+                input_features_dict['jkt'] = st.slider("Jumlah Kamar Tidur", 1, 6, 3)
+                input_features_dict['tahun_bangun'] = st.number_input("Tahun Bangun", min_value=1950, max_value=2030, value=2015)
 
             with col2:
                 input_features_dict['luas_bangunan_m2'] = st.number_input("Luas Bangunan (m²)", min_value=10, max_value=1000, value=80)
-                input_features_dict['jumlah_kamar_mandi'] = st.slider("Jumlah Kamar Mandi", 1, 4, 2)
+                input_features_dict['jkm'] = st.slider("Jumlah Kamar Mandi", 1, 4, 2)
 
             with col3:
-                carport_str = st.selectbox("Carport", ['Ada', 'Tidak Ada'])
-                input_features_dict['carport'] = 1 if carport_str == 'Ada' else 0
-                input_features_dict['listrik_va'] = st.number_input("Daya Listrik (VA)", min_value=900, max_value=30000, value=2200, step=100)
+                carport_str = st.selectbox("Carport / Garasi", ['Ada', 'Tidak Ada'])
+                input_features_dict['grs'] = 1 if carport_str == 'Ada' else 0
+                kondisi_options = preprocessor.categories_.get('kondisi', ['Bagus'])
+                input_features_dict['kondisi'] = st.selectbox("Kondisi", kondisi_options)
 
             new_data_raw = pd.DataFrame([input_features_dict])
 
             new_data_processed = None
-            if 'trained_model' in st.session_state and st.session_state['X_test_columns'] and 'data_scaler' in st.session_state:
+            if st.session_state.get('trained_model') is not None and st.session_state['X_test_columns'] and st.session_state.get('model_preprocessor') is not None:
                 try:
-                    new_data_aligned = new_data_raw.reindex(columns=st.session_state['X_test_columns'], fill_value=0)
-                    new_data_processed = st.session_state['data_scaler'].transform(new_data_aligned)
-                    new_data_processed = pd.DataFrame(new_data_processed, columns=st.session_state['X_test_columns'])
+                    # Gunakan preprocessor yang dipakai saat model dilatih
+                    model_preprocessor = st.session_state['model_preprocessor']
+                    # Validasi input terhadap skema data latih: kolom hilang/tipe/kategori salah tidak diam-diam diisi
+                    schema = getattr(model_preprocessor, 'schema_', None)
+                    report = schema.validate(new_data_raw) if schema is not None else None
+                    if report is not None and len(report.errors):
+                        issues = report.errors[['kolom', 'tingkat', 'nilai', 'pesan']].astype({'nilai': str})
+                        if report.is_valid:
+                            st.warning("Sebagian input berada di luar rentang data latih; prediksi mungkin kurang akurat.")
+                        else:
+                            st.error("Input tidak lolos validasi skema data latih.")
+                        st.dataframe(issues)
+                    if report is None or report.is_valid:
+                        new_data_processed = model_preprocessor.transform(new_data_raw)
+                        new_data_processed = new_data_processed[st.session_state['X_test_columns']]
 
                 except KeyError as e:
                     st.error(f"Error kolom input tidak cocok dengan model: {e}. Pastikan nama dan jumlah kolom input benar.")
@@ -200,15 +228,23 @@ def main():
                     st.error(f"Error saat pra-pemrosesan data input baru: {e}. Pastikan tipe data dan format sesuai.")
                     new_data_processed = None
             else:
-                st.warning("Model belum dilatih, kolom fitur tidak terdefinisi, atau scaler tidak tersedia. Silakan latih model terlebih dahulu.")
+                st.warning("Model belum dilatih, kolom fitur tidak terdefinisi, atau preprocessor tidak tersedia. Silakan latih model terlebih dahulu.")
                 new_data_processed = None
 
             if st.button("Prediksi Harga") and new_data_processed is not None:
                 if 'trained_model' in st.session_state:
                     model_loaded = st.session_state['trained_model']
-                    predicted_price = make_regression_prediction(model_loaded, new_data_processed)
+                    # Kombinasi input yang sama untuk model yang sama diambil dari cache prediksi
+                    cache = get_prediction_cache()
+                    predicted_price = cache.predict(
+                        new_data_raw, model_version(model_loaded),
+                        lambda raw: make_regression_prediction(model_loaded, new_data_processed.loc[raw.index]),
+                    )
                     if predicted_price is not None:
                         st.success(f"Harga prediksi untuk rumah ini adalah: **Rp {predicted_price[0]:,.2f}**")
+                        cache_stats = cache.stats()
+                        st.caption(f"Cache prediksi: hit-rate {cache_stats['hit_rate']:.0%} "
+                                   f"({cache_stats['hits']} hit, {cache_stats['misses']} miss, {cache_stats['size']} entri)")
                     else:
                         st.error("Gagal melakukan prediksi. Pastikan model telah dilatih dan input data sudah benar (termasuk skala).")
                 else:
@@ -217,15 +253,25 @@ def main():
 
         elif page == "Kategorisasi Harga":
             st.header("🔍 Kategorisasi Harga Rumah")
-            st.write("Mengategorikan harga rumah menjadi 'Murah', 'Normal', dan 'Mahal' berdasarkan kuantil.")
+            st.write("Mengategorikan harga rumah menjadi 'Murah', 'Normal', dan 'Mahal' berdasarkan kuantil atau clustering harga.")
 
             st.subheader("Metode Kategorisasi")
-            categorization_method = st.selectbox("Pilih Metode", ["Kuantil (33% | 66%)"])
+            categorization_methods = {
+                "Kuantil (33% | 66%)": 'quantiles',
+                "Kuantil Aproksimatif (Streaming Sketch)": 'sketch',
+                "K-Means (Log Harga)": 'kmeans',
+                "Jenks Natural Breaks (Log Harga)": 'jenks',
+            }
+            categorization_method = st.selectbox("Pilih Metode", list(categorization_methods))
 
             if st.button("Lakukan Kategorisasi"):
                 with st.spinner("Melakukan kategorisasi harga..."):
-                    df_categorized = categorize_price(df_processed.copy(), price_column='harga', method='quantiles')
+                    segmenter = fit_price_segments(df_processed['harga'], method=categorization_methods[categorization_method])
+                    df_categorized = categorize_price(df_processed, price_column='harga', segmenter=segmenter)
+                    st.session_state['price_segmenter'] = segmenter # Batas segmen bisa dipakai ulang untuk listing baru
                     st.success("Kategorisasi harga berhasil!")
+                    st.write("Batas harga per kategori:")
+                    st.dataframe(pd.DataFrame(segmenter.describe(), columns=['Kategori', 'Harga di atas (Rp)', 'Hingga (Rp)']).style.format({'Harga di atas (Rp)': '{:,.0f}', 'Hingga (Rp)': '{:,.0f}'}))
 
                     st.subheader("Hasil Kategorisasi")
                     st.write("DataFrame dengan kolom 'kategori_harga' baru (5 baris pertama):")
@@ -234,20 +280,9 @@ def main():
 
 
                     st.subheader("Distribusi Rumah per Kategori Harga")
-                    category_counts = df_categorized['kategori_harga'].value_counts().reindex(['Murah', 'Normal', 'Mahal'])
-                    fig1, ax1 = plt.subplots(figsize=(10, 6))
-                    sns.barplot(x=category_counts.index, y=category_counts.values, palette='viridis', ax=ax1)
-                    ax1.set_title('Jumlah Rumah per Kategori Harga')
-                    ax1.set_xlabel('Kategori Harga')
-                    ax1.set_ylabel('Jumlah Rumah')
-                    st.pyplot(fig1)
-
-                    fig2, ax2 = plt.subplots(figsize=(10, 6))
-                    sns.boxplot(x='kategori_harga', y='harga', data=df_categorized, order=['Murah', 'Normal', 'Mahal'], palette='viridis', ax=ax2)
-                    ax2.set_title('Distribusi Harga per Kategori Harga')
-                    ax2.set_xlabel('Kategori Harga')
-                    ax2.set_ylabel('Harga (Rupiah)')
-                    st.pyplot(fig2)
+                    counts_image, boxplot_image = render_price_categories_distribution(df_categorized, price_column='harga')
+                    st.image(counts_image)
+                    st.image(boxplot_image)
 
                     st.subheader("Profil Rata-rata Fitur per Kategori Harga")
                     category_summary = df_categorized.groupby('kategori_harga').mean(numeric_only=True).drop(columns=['harga'], errors='ignore')
@@ -276,12 +311,43 @@ def main():
     else:
         st.error("Gagal memuat data. Pastikan file 'data_rumah.xlsx' ada di direktori yang sama dan tidak rusak.")
 
+def show_perf_panel(records):
+    """Panel performa di sidebar: waktu, jumlah baris, dan puncak memori tiap tahap pada rerun ini."""
+    with st.sidebar.expander("⏱️ Performa Rerun Ini", expanded=True):
+        track_memory = st.checkbox("Ukur puncak memori (tracemalloc)", key='perf_track_memory',
+                                   help="Alokasi di ekstensi C (mis. pohon sklearn) tidak ikut terukur.")
+        enable_memory_tracking(track_memory) # Berlaku mulai rerun berikutnya
+        if not records:
+            st.write("Belum ada tahap yang tercatat.")
+            return
+        summary = summarize(records)
+        st.write(f"Total waktu tahap terluar: **{sum(r['seconds'] for r in records if r['parent'] is None):.3f} detik**")
+        st.dataframe(summary.style.format({'total_seconds': '{:.4f}', 'mean_seconds': '{:.4f}', 'max_seconds': '{:.4f}', 'peak_mb': '{:.2f}'}))
+        st.download_button("Unduh Metrik (Prometheus)", to_prometheus(records), file_name='metrics.prom')
+
 if __name__ == '__main__':
+    set_reporter(st) # Error/peringatan dari modul inti tampil di UI Streamlit
     if 'trained_model' not in st.session_state:
         st.session_state['trained_model'] = None
     if 'X_test_columns' not in st.session_state:
         st.session_state['X_test_columns'] = []
     if 'data_scaler' not in st.session_state:
         st.session_state['data_scaler'] = None
-
-    main()
\ No newline at end of file
+    if 'preprocessor' not in st.session_state:
+        st.session_state['preprocessor'] = None
+    if 'model_preprocessor' not in st.session_state:
+        st.session_state['model_preprocessor'] = None
+
+    # Warm start: muat model terakhir dari registry agar sesi baru tidak perlu melatih ulang
+    if st.session_state['trained_model'] is None:
+        latest_artifact = get_model_registry().load_latest()
+        if latest_artifact is not None:
+            st.session_state['trained_model'] = latest_artifact['model']
+            st.session_state['X_test_columns'] = latest_artifact['feature_columns']
+            st.session_state['model_preprocessor'] = latest_artifact['preprocessor']
+
+    # Catat tahap-tahap pipeline pada rerun ini untuk panel performa
+    with capture_stages() as stage_records:
+        main()
+    if st.session_state.get('show_perf_panel'):
+        show_perf_panel(stage_records)
\ No newline at end of file
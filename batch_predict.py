@@ -0,0 +1,181 @@
+# batch_predict.py
+"""
+Prediksi harga secara batch (tanpa UI) memakai model & preprocessor dari registry.
+
+Contoh CLI:
+    python batch_predict.py data/data_baru.csv hasil_prediksi.csv --batch-size 50000 --n-jobs 4
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from modeling import model_predict
+from registry import MODEL_REGISTRY_DIR, ModelRegistry
+from streaming import iter_chunks
+
+PREDICTION_COLUMN = 'prediksi_harga'
+
+# Artefak model milik proses worker (diisi sekali oleh initializer)
+_worker_artifact = None
+
+def score_dataframe(df, artifact):
+    """
+    Memvalidasi satu batch terhadap skema data latih, lalu memprediksi baris yang valid.
+    Mengembalikan (array prediksi dengan NaN untuk baris tidak valid, ValidationReport atau None
+    bila preprocessor lama belum menyimpan skema).
+    """
+    preprocessor = artifact['preprocessor']
+    schema = getattr(preprocessor, 'schema_', None)
+    report = schema.validate(df) if schema is not None else None
+    if report is not None and not report.is_valid:
+        predictions = np.full(len(df), np.nan)
+        if report.valid_mask.any():
+            valid = df[report.valid_mask]
+            predictions[report.valid_mask] = model_predict(artifact['model'], preprocessor.transform(valid)[artifact['feature_columns']])
+        return predictions, report
+    features = preprocessor.transform(df)[artifact['feature_columns']]
+    return model_predict(artifact['model'], features), report
+
+def predict_dataframe(df, artifact):
+    """Memproses satu batch listing mentah dan mengembalikan array prediksi (vektor, tanpa loop per baris)."""
+    return score_dataframe(df, artifact)[0]
+
+def _init_worker(registry_dir, key, artifact):
+    global _worker_artifact
+    if artifact is None:
+        artifact = ModelRegistry(registry_dir).load(key)
+    # Satu proses = satu core; hindari thread pool joblib di dalam tiap worker
+    artifact['model'].set_params(n_jobs=1)
+    _worker_artifact = artifact
+
+def _predict_in_worker(df):
+    predictions, report = score_dataframe(df, _worker_artifact)
+    # Hanya detail error yang dikirim balik ke proses utama, bukan seluruh laporan
+    return predictions, (report.errors if report is not None and not report.is_valid else None)
+
+class _PredictionWriter:
+    """Menulis hasil prediksi ke CSV atau Parquet secara bertahap, batch demi batch."""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = os.path.splitext(output_path)[1].lower() == '.parquet'
+        self._parquet_writer = None
+        self._header_written = False
+
+    def write(self, df):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.output_path, mode='a' if self._header_written else 'w', header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+def predict_file(input_path, output_path, artifact=None, registry_dir=MODEL_REGISTRY_DIR, key=None,
+                 batch_size=50_000, n_jobs=1, prediction_column=PREDICTION_COLUMN, verbose=False, errors_path=None):
+    """
+    Membaca listing dari CSV/Parquet per batch, memprediksi harganya, dan menulis hasilnya
+    (kolom asli + `prediction_column`) ke output_path secara bertahap.
+
+    Setiap batch divalidasi terhadap skema data latih: baris tidak valid tidak menghentikan job,
+    melainkan mendapat prediksi kosong (NaN) dan dicatat; dengan `errors_path`, detail error
+    per baris ditulis ke file CSV tersebut.
+
+    Tanpa `artifact`, model dimuat dari registry (kunci `key`, atau model terbaru).
+    Dengan n_jobs > 1, batch diproses paralel di process pool; urutan output tetap sama dengan input.
+    Mengembalikan ringkasan: jumlah baris, durasi, dan throughput (baris/detik).
+    """
+    if artifact is None:
+        registry = ModelRegistry(registry_dir)
+        key = key or registry.latest_key()
+        if key is None:
+            raise FileNotFoundError(f"Registry model di '{registry_dir}' masih kosong. Latih model terlebih dahulu.")
+        if n_jobs == 1:
+            artifact = registry.load(key)
+
+    writer = _PredictionWriter(output_path)
+    errors_writer = _PredictionWriter(errors_path) if errors_path else None
+    n_rows, n_batches, n_invalid = 0, 0, 0
+    start = time.perf_counter()
+
+    def write_batch(df, predictions, errors):
+        nonlocal n_rows, n_batches, n_invalid
+        predictions = np.asarray(predictions)
+        writer.write(df.assign(**{prediction_column: predictions}))
+        if errors is not None:
+            n_invalid += int(np.isnan(predictions).sum())
+            if errors_writer is not None:
+                errors_writer.write(errors.astype({'nilai': str}))
+        n_rows += len(df)
+        n_batches += 1
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"batch {n_batches}: {n_rows} baris, {n_rows / elapsed:,.0f} baris/detik")
+
+    try:
+        if n_jobs == 1:
+            for df in iter_chunks(input_path, batch_size):
+                predictions, report = score_dataframe(df, artifact)
+                write_batch(df, predictions, report.errors if report is not None and not report.is_valid else None)
+        else:
+            # Worker memuat artefak sekali dari registry (forest disalin ke memori tiap worker); batch dikirim per tugas
+            init_artifact = artifact if key is None else None
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(registry_dir, key, init_artifact)) as executor:
+                pending = deque()
+                for df in iter_chunks(input_path, batch_size):
+                    pending.append((df, executor.submit(_predict_in_worker, df)))
+                    # Batasi batch yang sedang berjalan agar memori tetap terkendali
+                    if len(pending) >= 2 * n_jobs:
+                        done_df, future = pending.popleft()
+                        write_batch(done_df, *future.result())
+                while pending:
+                    done_df, future = pending.popleft()
+                    write_batch(done_df, *future.result())
+    finally:
+        writer.close()
+        if errors_writer is not None:
+            errors_writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': n_rows,
+        'batches': n_batches,
+        'invalid_rows': n_invalid,
+        'seconds': elapsed,
+        'rows_per_sec': n_rows / elapsed if elapsed > 0 else float('nan'),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi harga rumah secara batch dari file CSV/Parquet.")
+    parser.add_argument('input', help="File listing (CSV atau Parquet)")
+    parser.add_argument('output', help="File hasil prediksi (CSV atau Parquet)")
+    parser.add_argument('--model-key', default=None, help="Kunci model di registry (default: model terbaru)")
+    parser.add_argument('--registry-dir', default=MODEL_REGISTRY_DIR)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--n-jobs', type=int, default=1, help="Jumlah proses paralel (-1 = semua core)")
+    parser.add_argument('--errors-output', default=None, help="File CSV untuk detail baris yang gagal validasi skema")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    n_jobs = os.cpu_count() if args.n_jobs == -1 else max(1, args.n_jobs)
+    stats = predict_file(args.input, args.output, registry_dir=args.registry_dir, key=args.model_key,
+                         batch_size=args.batch_size, n_jobs=n_jobs, verbose=args.verbose, errors_path=args.errors_output)
+    print(f"Selesai: {stats['rows']} baris dalam {stats['seconds']:.2f} detik ({stats['rows_per_sec']:,.0f} baris/detik)")
+    if stats['invalid_rows']:
+        print(f"{stats['invalid_rows']} baris tidak lolos validasi skema dan tidak diprediksi.")
+
+if __name__ == '__main__':
+    main()
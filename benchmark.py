@@ -0,0 +1,290 @@
+# benchmark.py
+"""
+Harness benchmark pipeline: data sintetis dengan skema yang sama seperti data/data_baru.csv,
+diukur per tahap (waktu dan puncak memori), hasil dalam JSON yang bisa dibandingkan antar commit.
+
+Contoh:
+    python benchmark.py --sizes 1k,100k --output bench.json
+    python benchmark.py --sizes 1k,100k --baseline bench_lama.json --threshold 0.2
+
+Keluar dengan kode 1 jika ada tahap yang lebih lambat (atau lebih boros memori) dari
+baseline melebihi ambang.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+SIZES = {'1k': 1_000, '100k': 100_000, '10m': 10_000_000}
+KONDISI = ['Bagus', 'Baru', 'Butuh Renovasi']
+GENERATE_CHUNK_ROWS = 1_000_000
+# Forest 100 pohon di 10 juta baris tidak realistis untuk benchmark; pelatihan memakai sampel
+DEFAULT_MAX_TRAIN_ROWS = 200_000
+PREDICT_SINGLE_REPEATS = 50
+# Modul inti yang dipakai batch job/worker: waktu impornya diukur dan tidak boleh memuat paket berat
+CORE_MODULES = ['preprocessing', 'streaming', 'modeling', 'registry', 'batch_predict', 'server', 'clustering']
+HEAVY_MODULES = ['streamlit', 'matplotlib', 'seaborn', 'sklearn']
+_IMPORT_PROBE = (
+    "import json, sys, time; start = time.perf_counter(); import {module}; "
+    "print(json.dumps({{'seconds': time.perf_counter() - start, "
+    "'heavy': [m for m in {heavy!r} if m in sys.modules]}}))"
+)
+
+def generate_listings(n_rows, seed=0):
+    """Listing sintetis dengan kolom dan format mentah yang sama seperti data/data_baru.csv."""
+    rng = np.random.default_rng(seed)
+    luas_tanah = rng.lognormal(5.3, 0.6, n_rows).round()
+    luas_bangunan = (luas_tanah * rng.uniform(0.5, 1.5, n_rows)).round()
+    jkt = rng.integers(1, 8, n_rows)
+    jkm = np.clip(jkt + rng.integers(-1, 2, n_rows), 1, None)
+    grs = rng.choice([0.0, 1.0, np.nan], size=n_rows, p=[0.3, 0.65, 0.05])
+    tahun = rng.integers(1980, 2025, n_rows)
+    kondisi = rng.choice(KONDISI, size=n_rows, p=[0.35, 0.3, 0.35])
+    faktor_kondisi = np.select([kondisi == 'Baru', kondisi == 'Butuh Renovasi'], [1.2, 0.8], 1.0)
+    harga = (luas_tanah * 15e6 + luas_bangunan * 5e6) * faktor_kondisi * rng.lognormal(0, 0.25, n_rows)
+    return pd.DataFrame({
+        'HARGA': (harga // 1e6 * 1e6).astype(np.int64),
+        'Luas Tanah M2': luas_tanah.astype(np.int64),
+        'Luas Bangunan M2': luas_bangunan.astype(np.int64),
+        'JKT': jkt,
+        'JKM': jkm,
+        'GRS': grs,
+        'Tahun Bangun': tahun,
+        'Kondisi': kondisi,
+    })
+
+def write_listings(path, n_rows, seed=0):
+    """Menulis data sintetis ke CSV per potongan agar ukuran 10 juta baris tidak perlu muat di memori sekaligus."""
+    written = 0
+    chunk_index = 0
+    while written < n_rows:
+        n_chunk = min(GENERATE_CHUNK_ROWS, n_rows - written)
+        generate_listings(n_chunk, seed + chunk_index).to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n_chunk
+        chunk_index += 1
+    return path
+
+def _current_rss():
+    """RSS proses saat ini (byte), dari /proc (Linux)."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def _peak_rss_child(connection, fn, args, kwargs):
+    import resource
+    start = _current_rss()
+    fn(*args, **kwargs)
+    # ru_maxrss dalam KB di Linux; proses hasil fork tidak mewarisi puncak RSS induknya
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    connection.send(max(peak - start, 0))
+
+def _peak_rss(fn, args, kwargs):
+    """
+    Kenaikan puncak RSS (byte) saat fn dijalankan sekali di proses anak hasil fork.
+    RSS mencakup alokasi di luar Python (mis. node pohon sklearn di Cython), yang tidak
+    terlihat oleh tracemalloc. None jika fork atau /proc tidak tersedia (mis. Windows/macOS).
+    """
+    if not os.path.exists('/proc/self/statm') or 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_peak_rss_child, args=(sender, fn, args, kwargs))
+    process.start()
+    sender.close()
+    try:
+        peak = receiver.recv()
+    except EOFError: # Proses anak gagal sebelum mengirim hasil
+        peak = None
+    process.join()
+    return peak
+
+def measure(fn, *args, repeat=3, **kwargs):
+    """
+    Menjalankan fn `repeat` kali untuk waktu (diambil minimum), lalu sekali lagi di proses anak
+    untuk kenaikan puncak RSS. Mengembalikan (hasil, detik, puncak MB).
+    Tanpa fork (Windows/macOS), puncak memori diukur dengan tracemalloc, yang hanya melihat
+    alokasi Python/NumPy dan tidak melihat alokasi di ekstensi C seperti pohon sklearn.
+    """
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        seconds.append(time.perf_counter() - start)
+    peak = _peak_rss(fn, args, kwargs)
+    if peak is None:
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return result, min(seconds), peak / 2 ** 20
+
+def measure_imports(modules=CORE_MODULES, repeat=3):
+    """
+    Waktu impor setiap modul inti di proses Python baru (minimum dari `repeat` kali), beserta
+    daftar paket berat yang ikut termuat. Interpreter dan pandas/numpy ikut dalam waktu impor,
+    sehingga angka ini mewakili biaya start-up worker berumur pendek.
+    """
+    results = []
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        seconds, heavy = [], []
+        for _ in range(repeat):
+            output = subprocess.run(
+                [sys.executable, '-c', _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                capture_output=True, text=True, check=True, cwd=here,
+            ).stdout
+            probe = json.loads(output.strip().splitlines()[-1])
+            seconds.append(probe['seconds'])
+            heavy = probe['heavy']
+        results.append({'size': 'import', 'stage': f'import {module}', 'rows': None, 'seconds': min(seconds),
+                        'peak_mb': None, 'heavy_modules': heavy})
+    return results
+
+def run_size(label, n_rows, workdir, repeat=3, max_train_rows=DEFAULT_MAX_TRAIN_ROWS, seed=0):
+    """Mengukur setiap tahap pipeline untuk satu ukuran data; mengembalikan daftar hasil per tahap."""
+    from clustering import categorize_price
+    from modeling import make_regression_prediction, train_regression_model
+    from preprocessing import load_data, preprocess_data
+
+    path = write_listings(os.path.join(workdir, f'listings_{label}.csv'), n_rows, seed)
+    results = []
+
+    def record(stage, seconds, peak_mb, rows, **extra):
+        results.append({'size': label, 'stage': stage, 'rows': rows, 'seconds': seconds, 'peak_mb': peak_mb, **extra})
+
+    df, seconds, peak = measure(load_data, path, use_cache=False, repeat=repeat)
+    record('load_data', seconds, peak, len(df))
+
+    (df_processed, _), seconds, peak = measure(preprocess_data, df, repeat=repeat)
+    record('preprocess_data', seconds, peak, len(df_processed))
+
+    train_df = df_processed
+    if len(train_df) > max_train_rows:
+        train_df = df_processed.sample(n=max_train_rows, random_state=seed)
+    # Pelatihan mahal: cukup sekali untuk waktu (tanpa registry agar tidak ada cache hit)
+    (model, X_test, _, _, _), seconds, peak = measure(train_regression_model, train_df, repeat=1)
+    record('train_regression_model', seconds, peak, len(train_df))
+
+    _, seconds, peak = measure(make_regression_prediction, model, X_test, repeat=repeat)
+    record('make_regression_prediction', seconds, peak, len(X_test))
+
+    single_row = X_test.iloc[:1]
+    _, seconds, peak = measure(make_regression_prediction, model, single_row, repeat=PREDICT_SINGLE_REPEATS)
+    record('make_regression_prediction_1row', seconds, peak, 1)
+
+    _, seconds, peak = measure(categorize_price, df_processed, repeat=repeat)
+    record('categorize_price', seconds, peak, len(df_processed))
+
+    os.remove(path)
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(sizes=('1k', '100k'), repeat=3, max_train_rows=DEFAULT_MAX_TRAIN_ROWS, seed=0):
+    """Menjalankan benchmark untuk setiap ukuran; mengembalikan dict siap ditulis sebagai JSON."""
+    import sklearn
+
+    results = measure_imports(repeat=repeat)
+    with tempfile.TemporaryDirectory() as workdir:
+        for label in sizes:
+            results.extend(run_size(label, SIZES[label], workdir, repeat, max_train_rows, seed))
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold=0.2, min_seconds=0.01):
+    """
+    Membandingkan hasil dengan baseline. Sebuah tahap dianggap regresi jika waktunya atau
+    puncak memorinya naik lebih dari `threshold` (0.2 = 20%). Tahap yang lebih cepat dari
+    `min_seconds` di baseline tidak dinilai waktunya karena terlalu dipengaruhi noise.
+    Impor modul inti yang mulai memuat paket berat (HEAVY_MODULES) juga dihitung sebagai regresi.
+    Mengembalikan daftar regresi (dict).
+    """
+    reference = {(r['size'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        base = reference.get((result['size'], result['stage']))
+        if base is None:
+            continue
+        new_heavy = sorted(set(result.get('heavy_modules') or []) - set(base.get('heavy_modules') or []))
+        if new_heavy:
+            regressions.append({
+                'size': result['size'], 'stage': result['stage'], 'metric': 'heavy_modules',
+                'baseline': len(base.get('heavy_modules') or []), 'current': len(result['heavy_modules']),
+                'ratio': float('inf'), 'modules': new_heavy,
+            })
+        for metric in ('seconds', 'peak_mb'):
+            if base[metric] is None or result[metric] is None:
+                continue
+            if metric == 'seconds' and base[metric] < min_seconds:
+                continue
+            if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+                regressions.append({
+                    'size': result['size'], 'stage': result['stage'], 'metric': metric,
+                    'baseline': base[metric], 'current': result[metric],
+                    'ratio': result[metric] / base[metric],
+                })
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark pipeline harga rumah.')
+    parser.add_argument('--sizes', default='1k,100k', help=f"Ukuran data, dipisah koma ({', '.join(SIZES)})")
+    parser.add_argument('--repeat', type=int, default=3, help='Jumlah pengulangan per tahap (diambil waktu minimum)')
+    parser.add_argument('--max-train-rows', type=int, default=DEFAULT_MAX_TRAIN_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Tulis hasil JSON ke file ini (default: stdout)')
+    parser.add_argument('--baseline', help='File JSON hasil benchmark sebelumnya untuk pembanding')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Ambang regresi relatif (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip().lower() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Ukuran tidak dikenal: {', '.join(unknown)}")
+
+    report = run_benchmark(sizes, args.repeat, args.max_train_rows, args.seed)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(baseline, report, args.threshold)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    for regression in report.get('regressions', []):
+        print(f"REGRESI {regression['size']}/{regression['stage']} {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})", file=sys.stderr)
+    return 1 if report.get('regressions') else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,68 +1,212 @@
+import logging
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-# from sklearn.cluster import KMeans # Tidak lagi dibutuhkan untuk kategorisasi
 
+from instrumentation import stage
+from plotting import hash_data, new_figure, submit_render
+from streaming import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+PRICE_LABELS = ['Murah', 'Normal', 'Mahal']
+DEFAULT_QUANTILES = (0.33, 0.66)
+SEGMENTATION_METHODS = ('quantiles', 'sketch', 'kmeans', 'jenks')
+JENKS_MAX_SAMPLES = 2_000 # Jenks O(k * n^2): dihitung dari sampel terurut sebesar ini
+KMEANS_MAX_SAMPLES = 100_000
 
-def categorize_price(df_processed, price_column='harga', method='quantiles'):
+class PriceSegmenter:
     """
-    Mengkategorikan harga rumah menjadi 'Murah', 'Normal', 'Mahal'.
-    Mengembalikan DataFrame dengan kolom 'kategori_harga' baru.
+    Batas kategori harga yang sudah dipelajari (titik potong antar segmen).
+    Dapat dipakai ulang untuk listing baru: penetapan kategori per baris O(log k) dengan searchsorted.
+    Segmen ke-i mencakup (edges[i-1], edges[i]]; segmen pertama/terakhir terbuka ke -inf/+inf.
     """
-    df_categorized = df_processed.copy()
 
-    if price_column not in df_categorized.columns:
-        print(f"❌ Error: Kolom '{price_column}' tidak ditemukan untuk kategorisasi harga.")
-        return df_categorized
+    def __init__(self, edges, labels=None, method=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.labels = list(labels) if labels is not None else _default_labels(len(self.edges) + 1)
+        self.method = method
+        if len(self.labels) != len(self.edges) + 1:
+            raise ValueError("Jumlah label harus sama dengan jumlah titik potong + 1.")
 
-    print(f"\n--- Tahap Kategorisasi Harga: {price_column} ---")
+    def assign(self, prices):
+        """Mengembalikan pd.Categorical berisi label segmen untuk setiap harga (NaN tetap NaN)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        codes = np.searchsorted(self.edges, prices, side='left')
+        codes[np.isnan(prices)] = -1
+        return pd.Categorical.from_codes(codes, categories=self.labels)
 
-    if method == 'quantiles':
-        # Hitung kuantil (33.3% dan 66.7%)
-        q1 = df_categorized[price_column].quantile(0.33)
-        q2 = df_categorized[price_column].quantile(0.66)
+    def describe(self):
+        """Rentang harga tiap segmen sebagai list (label, batas bawah, batas atas)."""
+        bounds = np.concatenate([[-np.inf], self.edges, [np.inf]])
+        return [(label, bounds[i], bounds[i + 1]) for i, label in enumerate(self.labels)]
+
+def _default_labels(n_segments):
+    return PRICE_LABELS if n_segments == len(PRICE_LABELS) else [f'Segmen {i + 1}' for i in range(n_segments)]
+
+def _as_chunks(prices):
+    """Menerima array/Series tunggal atau iterable berisi chunk harga."""
+    if isinstance(prices, (pd.Series, np.ndarray, list, tuple)):
+        return [np.asarray(prices, dtype=np.float64)]
+    return (np.asarray(chunk, dtype=np.float64) for chunk in prices)
+
+def _jenks_breaks(values, n_segments):
+    """Jenks natural breaks (Fisher) pada nilai terurut; mengembalikan nilai maksimum tiap kelas kecuali kelas terakhir."""
+    n = len(values)
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    prefix_sq = np.concatenate([[0.0], np.cumsum(values ** 2)])
 
-        # Definisikan bin dan label
-        bins = [df_categorized[price_column].min() - 1, q1, q2, df_categorized[price_column].max() + 1]
-        labels = ['Murah', 'Normal', 'Mahal']
+    def sse(start, end):
+        # Jumlah kuadrat deviasi untuk values[start:end] (vektor terhadap start)
+        count = end - start
+        total = prefix[end] - prefix[start]
+        return (prefix_sq[end] - prefix_sq[start]) - total ** 2 / count
 
-        df_categorized['kategori_harga'] = pd.cut(df_categorized[price_column], bins=bins, labels=labels, include_lowest=True, right=True)
-        print(f"  ✔️ Harga dikategorikan berdasarkan kuantil:\n    Murah: < Rp {q1:,.2f}\n    Normal: Rp {q1:,.2f} - Rp {q2:,.2f}\n    Mahal: > Rp {q2:,.2f}")
+    # cost[k, j]: SSE minimum untuk j nilai pertama dalam k+1 kelas
+    cost = np.full((n_segments, n + 1), np.inf)
+    split = np.zeros((n_segments, n + 1), dtype=np.int64)
+    ends = np.arange(1, n + 1)
+    cost[0, 1:] = sse(np.zeros_like(ends), ends)
+    for k in range(1, n_segments):
+        for end in range(k + 1, n + 1):
+            starts = np.arange(k, end)
+            candidates = cost[k - 1, starts] + sse(starts, end)
+            best = int(np.argmin(candidates))
+            cost[k, end], split[k, end] = candidates[best], starts[best]
+
+    breaks, end = [], n
+    for k in range(n_segments - 1, 0, -1):
+        end = split[k, end]
+        breaks.append(values[end - 1])
+    return np.array(breaks[::-1])
+
+def fit_price_segments(prices, method='quantiles', n_segments=3, labels=None, quantiles=None, random_state=42):
+    """
+    Mempelajari batas segmen harga dan mengembalikan PriceSegmenter.
+
+    method:
+    - 'quantiles': kuantil eksak (default 33% | 66% untuk 3 segmen).
+    - 'sketch'   : kuantil aproksimatif streaming (QuantileSketch bergaya KLL); `prices` boleh berupa
+                   iterable chunk, sehingga riwayat penuh tidak perlu dimuat ke memori.
+    - 'kmeans'   : MiniBatchKMeans pada log harga; batas = titik tengah antar pusat cluster.
+    - 'jenks'    : Jenks natural breaks pada log harga (dari sampel terurut).
+    """
+    if method not in SEGMENTATION_METHODS:
+        raise ValueError(f"Metode kategorisasi '{method}' tidak valid. Pilih salah satu dari {SEGMENTATION_METHODS}.")
+    if quantiles is None:
+        quantiles = DEFAULT_QUANTILES if n_segments == 3 else tuple(np.arange(1, n_segments) / n_segments)
+
+    if method == 'sketch':
+        sketch = QuantileSketch()
+        for chunk in _as_chunks(prices):
+            sketch.update(chunk)
+        edges = sketch.quantiles(quantiles)
+        return PriceSegmenter(edges, labels or _default_labels(n_segments), method)
+
+    prices = np.concatenate(list(_as_chunks(prices)))
+    prices = prices[~np.isnan(prices)]
+    if method == 'quantiles':
+        edges = np.quantile(prices, quantiles)
     else:
-        print("  ❌ Metode kategorisasi tidak valid. Menggunakan metode default 'quantiles'.")
-        return categorize_price(df_processed, price_column, 'quantiles') # Rekursif ke metode default
+        rng = np.random.default_rng(random_state)
+        log_prices = np.log1p(np.clip(prices, 0, None))
+        if method == 'kmeans':
+            from sklearn.cluster import MiniBatchKMeans
+            if len(log_prices) > KMEANS_MAX_SAMPLES:
+                log_prices = rng.choice(log_prices, KMEANS_MAX_SAMPLES, replace=False)
+            kmeans = MiniBatchKMeans(n_clusters=n_segments, random_state=random_state, n_init=3)
+            kmeans.fit(log_prices.reshape(-1, 1))
+            centers = np.sort(kmeans.cluster_centers_.ravel())
+            log_edges = (centers[:-1] + centers[1:]) / 2
+        else:
+            if len(log_prices) > JENKS_MAX_SAMPLES:
+                log_prices = rng.choice(log_prices, JENKS_MAX_SAMPLES, replace=False)
+            log_edges = _jenks_breaks(np.sort(log_prices), n_segments)
+        edges = np.expm1(log_edges)
+    return PriceSegmenter(edges, labels or _default_labels(n_segments), method)
 
-    print("--- Kategorisasi Harga Selesai ---")
+def categorize_price(df_processed, price_column='harga', method='quantiles', segmenter=None, inplace=False, **kwargs):
+    """
+    Mengkategorikan harga rumah menjadi 'Murah', 'Normal', 'Mahal'.
+    Mengembalikan DataFrame dengan kolom 'kategori_harga' baru.
+
+    Jika `segmenter` (PriceSegmenter) diberikan, batas yang sudah ada dipakai ulang tanpa menghitung
+    ulang kuantil; jika tidak, batas dipelajari dengan fit_price_segments(method, **kwargs).
+    Tanpa inplace=True, hanya salinan dangkal (shallow copy) DataFrame yang dibuat.
+    """
+    if price_column not in df_processed.columns:
+        raise KeyError(f"Kolom '{price_column}' tidak ditemukan untuk kategorisasi harga.")
+
+    with stage('categorize', rows=len(df_processed)):
+        prices = df_processed[price_column]
+        if segmenter is None:
+            segmenter = fit_price_segments(prices, method=method, **kwargs)
+
+        df_categorized = df_processed if inplace else df_processed.copy(deep=False)
+        df_categorized['kategori_harga'] = segmenter.assign(prices)
+    logger.info("Harga dikategorikan (%s): %s", segmenter.method, segmenter.describe())
     return df_categorized
 
+def _category_order(categories):
+    """Urutan segmen untuk plot: urutan kategori Categorical (dari PriceSegmenter), jika tidak, urutan nilai."""
+    if isinstance(categories.dtype, pd.CategoricalDtype):
+        return list(categories.cat.categories)
+    values = categories.dropna().unique().tolist()
+    return PRICE_LABELS if set(values) <= set(PRICE_LABELS) else sorted(values, key=str)
+
+def _draw_category_counts(fig, category_counts):
+    import seaborn as sns # Impor berat: hanya saat merender
+    ax = fig.subplots()
+    sns.barplot(x=category_counts.index, y=category_counts.values, palette='viridis', ax=ax)
+    ax.set_title('Jumlah Rumah per Kategori Harga')
+    ax.set_xlabel('Kategori Harga')
+    ax.set_ylabel('Jumlah Rumah')
+    fig.tight_layout()
+
+def _draw_category_boxplot(fig, df_categorized, price_column, category_column, order):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.boxplot(x=category_column, y=price_column, data=df_categorized, order=order, palette='viridis', ax=ax)
+    ax.set_title(f'Distribusi {price_column.title()} per Kategori Harga')
+    ax.set_xlabel('Kategori Harga')
+    ax.set_ylabel(f'{price_column.title()} (Rupiah)')
+    fig.tight_layout()
+
 def plot_price_categories_distribution(df_categorized, price_column='harga', category_column='kategori_harga'):
     """
     Membuat plot distribusi harga per kategori.
+    Mengembalikan (figure jumlah rumah per kategori, figure box plot harga per kategori).
     """
     if category_column not in df_categorized.columns:
-        print(f"❌ Error: Kolom '{category_column}' tidak ditemukan untuk visualisasi kategori.")
+        logger.error("Kolom '%s' tidak ditemukan untuk visualisasi kategori.", category_column)
         return None
 
-    print(f"\n--- Visualisasi Distribusi Kategori Harga: {category_column} ---")
-
-    # Hitung jumlah rumah per kategori
-    category_counts = df_categorized[category_column].value_counts().reindex(['Murah', 'Normal', 'Mahal'])
+    # Hitung jumlah rumah per kategori, dalam urutan segmen (jumlah segmen bisa selain 3)
+    order = _category_order(df_categorized[category_column])
+    category_counts = df_categorized[category_column].value_counts().reindex(order, fill_value=0)
 
     # Plot bar chart jumlah rumah per kategori
-    fig1, ax1 = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=category_counts.index, y=category_counts.values, palette='viridis', ax=ax1)
-    ax1.set_title('Jumlah Rumah per Kategori Harga')
-    ax1.set_xlabel('Kategori Harga')
-    ax1.set_ylabel('Jumlah Rumah')
-    plt.tight_layout()
-    plt.show() # Tampilkan plot di Jupyter/Streamlit
-
-    # Plot box plot atau violin plot untuk melihat distribusi harga dalam setiap kategori
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
-    sns.boxplot(x=category_column, y=price_column, data=df_categorized, order=['Murah', 'Normal', 'Mahal'], palette='viridis', ax=ax2)
-    ax2.set_title(f'Distribusi {price_column.title()} per Kategori Harga')
-    ax2.set_xlabel('Kategori Harga')
-    ax2.set_ylabel(f'{price_column.title()} (Rupiah)')
-    plt.tight_layout()
-    plt.show() # Tampilkan plot di Jupyter/Streamlit
\ No newline at end of file
+    fig1 = new_figure(figsize=(10, 6))
+    _draw_category_counts(fig1, category_counts)
+
+    # Plot box plot untuk melihat distribusi harga dalam setiap kategori
+    fig2 = new_figure(figsize=(10, 6))
+    _draw_category_boxplot(fig2, df_categorized[[category_column, price_column]], price_column, category_column, order)
+    return fig1, fig2
+
+def render_price_categories_distribution(df_categorized, price_column='harga', category_column='kategori_harga'):
+    """
+    Seperti plot_price_categories_distribution, tetapi kedua plot dirender paralel di render pool
+    dan dikembalikan sebagai bytes PNG (di-cache berdasarkan hash data).
+    """
+    if category_column not in df_categorized.columns:
+        logger.error("Kolom '%s' tidak ditemukan untuk visualisasi kategori.", category_column)
+        return None
+
+    data = df_categorized[[category_column, price_column]]
+    order = _category_order(data[category_column])
+    category_counts = data[category_column].value_counts().reindex(order, fill_value=0)
+    key = hash_data(data[price_column], data[category_column].astype(str), order)
+    counts_future = submit_render(_draw_category_counts, category_counts, cache_key=key)
+    boxplot_future = submit_render(_draw_category_boxplot, data, price_column, category_column, order, cache_key=key)
+    return counts_future.result(), boxplot_future.result()
@@ -0,0 +1,123 @@
+# eda_cache.py
+"""
+Cache artefak EDA untuk halaman "Eksplorasi Data".
+
+Ringkasan statistik, matriks korelasi, histogram harga, dan gambar plot (PNG) dihitung
+sekali per fingerprint dataset, lalu dilayani dari memori atau disk pada kunjungan berikutnya.
+Untuk data besar, korelasi dan KDE dihitung dari sampel, dan histogram dari data yang di-bin.
+"""
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from plotting import submit_render
+from registry import dataframe_fingerprint
+
+EDA_CACHE_DIR = os.environ.get('TUBES_EDA_CACHE_DIR', os.path.join('.cache', 'eda'))
+# Naikkan jika isi/format artefak berubah agar cache lama di disk tidak dipakai
+EDA_CACHE_VERSION = 1
+
+CORR_SAMPLE_ROWS = 200_000 # Korelasi dihitung dari sampel sebesar ini
+KDE_SAMPLE_ROWS = 20_000 # KDE dihitung dari sampel sebesar ini
+HIST_BINS = 50
+MAX_ANNOTATED_COLUMNS = 20 # Heatmap lebih lebar dari ini digambar tanpa anotasi angka
+
+_eda_cache = {}
+
+def _sample(df, n_rows, random_state=0):
+    return df if len(df) <= n_rows else df.sample(n=n_rows, random_state=random_state)
+
+def _gaussian_kde(values, grid):
+    """KDE Gaussian (bandwidth Scott) yang dievaluasi pada titik-titik grid."""
+    values = values[~np.isnan(values)]
+    if len(values) < 2 or values.std() == 0:
+        return np.zeros_like(grid)
+    bandwidth = values.std(ddof=1) * len(values) ** (-1 / 5)
+    z = (grid[:, None] - values[None, :]) / bandwidth
+    return np.exp(-0.5 * z ** 2).sum(axis=1) / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+def _draw_price_histogram(fig, counts, edges, kde_grid, kde_counts):
+    ax = fig.subplots()
+    ax.stairs(counts, edges, fill=True, alpha=0.6)
+    ax.plot(kde_grid, kde_counts)
+    ax.set_title('Distribusi Harga Rumah')
+    ax.set_xlabel('Harga (Rupiah)')
+    ax.set_ylabel('Frekuensi')
+
+def _draw_correlation_heatmap(fig, corr):
+    import seaborn as sns # Impor berat: hanya saat merender
+    ax = fig.subplots()
+    annotate = len(corr.columns) <= MAX_ANNOTATED_COLUMNS
+    sns.heatmap(corr, annot=annotate, cmap='coolwarm', fmt=".2f", ax=ax)
+    ax.set_title('Matriks Korelasi Fitur')
+
+def _compute(df_processed, price_column, image_format):
+    numeric = df_processed.select_dtypes(include=np.number)
+    artifacts = {
+        'n_rows': len(df_processed),
+        'describe': df_processed.describe(),
+        'corr': _sample(numeric, CORR_SAMPLE_ROWS).corr(),
+    }
+    # Heatmap dirender di render pool sementara histogram/KDE dihitung di thread ini
+    corr_future = submit_render(_draw_correlation_heatmap, artifacts['corr'], figsize=(12, 10), image_format=image_format)
+
+    if price_column in df_processed.columns:
+        prices = df_processed[price_column].to_numpy(dtype=np.float64)
+        finite = prices[np.isfinite(prices)]
+        # Histogram dari seluruh data (satu lintasan), KDE dari sampel lalu diskalakan ke frekuensi
+        counts, edges = np.histogram(finite, bins=HIST_BINS)
+        grid = np.linspace(edges[0], edges[-1], 200)
+        kde_values = _sample(pd.Series(finite), KDE_SAMPLE_ROWS).to_numpy()
+        kde_counts = _gaussian_kde(kde_values, grid) * len(finite) * (edges[1] - edges[0])
+        artifacts['price_histogram'] = {'counts': counts, 'edges': edges}
+        artifacts['price_histogram_image'] = submit_render(
+            _draw_price_histogram, counts, edges, grid, kde_counts, figsize=(10, 6), image_format=image_format,
+        ).result()
+    artifacts['corr_image'] = corr_future.result()
+    return artifacts
+
+def get_eda_artifacts(df_processed, fingerprint=None, price_column='harga', image_format='png', use_disk=True):
+    """
+    Mengembalikan artefak EDA untuk df_processed: 'describe', 'corr', 'price_histogram',
+    serta gambar siap tampil 'corr_image' dan 'price_histogram_image' (bytes PNG/SVG).
+
+    Tanpa `fingerprint`, kunci dihitung dari isi df_processed (disarankan): perubahan data maupun
+    pra-pemrosesan otomatis membatalkan cache. Fingerprint dari pemanggil (mis. file sumber saja)
+    hanya aman jika ikut mencakup versi pra-pemrosesan.
+    """
+    fingerprint = fingerprint or dataframe_fingerprint(df_processed)
+    key = f"v{EDA_CACHE_VERSION}-{fingerprint}-{price_column}-{image_format}"
+    if key in _eda_cache:
+        return _eda_cache[key]
+
+    cache_path = os.path.join(EDA_CACHE_DIR, f"{key}.pkl")
+    artifacts = None
+    if use_disk and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                artifacts = pickle.load(f)
+        except Exception:
+            artifacts = None # Cache rusak: hitung ulang
+
+    if artifacts is None:
+        artifacts = _compute(df_processed, price_column, image_format)
+        if use_disk:
+            os.makedirs(EDA_CACHE_DIR, exist_ok=True)
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(artifacts, f)
+            os.replace(tmp_path, cache_path)
+
+    _eda_cache[key] = artifacts
+    return artifacts
+
+def clear_eda_cache():
+    """Menghapus cache EDA di memori dan di disk."""
+    _eda_cache.clear()
+    if os.path.isdir(EDA_CACHE_DIR):
+        for name in os.listdir(EDA_CACHE_DIR):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(EDA_CACHE_DIR, name))
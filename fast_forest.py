@@ -0,0 +1,152 @@
+# fast_forest.py
+"""
+Mesin inferensi forest yang "diratakan" (flattened) untuk prediksi satu baris / batch kecil.
+
+Seluruh pohon RandomForestRegressor dikemas ke array NumPy (feature, threshold, child kiri/kanan,
+value). Traversal dilakukan serentak untuk semua pohon dan semua baris dengan operasi vektor,
+tanpa dispatch thread pool joblib seperti pada model.predict.
+
+    python fast_forest.py    # benchmark terhadap predict bawaan sklearn
+"""
+
+import time
+import weakref
+
+import numpy as np
+
+class FlatForest:
+    """Forest regresi dalam bentuk array NumPy terpadu; hasil predict sama dengan sklearn (toleransi float)."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.feature_names = feature_names
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Mengekspor RandomForestRegressor (atau DecisionTreeRegressor) yang sudah dilatih."""
+        estimators = getattr(model, 'estimators_', [model])
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("FlatForest hanya mendukung regresi dengan satu target.")
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            # Daun menunjuk ke dirinya sendiri, sehingga traversal sepanjang max_depth tetap berhenti di daun
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            feature_names=None if feature_names is None else list(feature_names),
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Indeks daun (global) untuk tiap baris dan tiap pohon, bentuk (n_baris, n_pohon)."""
+        if self.feature_names is not None and hasattr(X, 'columns'):
+            X = X[self.feature_names]
+        # sklearn membandingkan fitur sebagai float32 dengan threshold float64
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict(self, X):
+        return self.value[self.apply(X)].mean(axis=1)
+
+# Cache hasil kompilasi per objek model (hilang otomatis saat model dibuang):
+# model -> (tanda daftar pohon saat dikompilasi, FlatForest)
+_compiled = weakref.WeakKeyDictionary()
+
+def _estimators_signature(model):
+    """Tanda daftar pohon: berubah jika pohon ditambah (warm_start), dibuang, atau diganti."""
+    return tuple(map(id, getattr(model, 'estimators_', [model])))
+
+def compile_forest(model):
+    """
+    Mengembalikan FlatForest untuk model (dikompilasi sekali per objek model).
+
+    Biaya memori: FlatForest adalah salinan array node semua pohon (feature, threshold,
+    anak kiri/kanan, value) dan disimpan selama objek model hidup, sehingga memori forest
+    kira-kira menjadi dua kali lipat. Jika daftar pohon berubah (mis. warm_start atau
+    pemangkasan di incremental.py), kompilasi diulang otomatis; invalidate_compiled(model)
+    membuang salinan secara eksplisit, mis. untuk membebaskan memori.
+    """
+    if isinstance(model, FlatForest):
+        return model
+    signature = _estimators_signature(model)
+    cached = _compiled.get(model)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    flat = FlatForest.from_sklearn(model)
+    _compiled[model] = (signature, flat)
+    return flat
+
+def invalidate_compiled(model):
+    """Membuang FlatForest hasil kompilasi untuk model (dipanggil setelah pohon model diubah)."""
+    _compiled.pop(model, None)
+
+def benchmark(model, X, n_repeats=200, batch_sizes=(1, 10, 100)):
+    """
+    Membandingkan latensi model.predict (sklearn) dengan FlatForest.predict.
+    Mengembalikan list dict: ukuran batch, latensi rata-rata (ms) keduanya, speedup, dan selisih maksimum.
+    """
+    flat = compile_forest(model)
+    X = np.asarray(X)
+    results = []
+    for batch_size in batch_sizes:
+        batch = X[:batch_size]
+        timings = {}
+        for name, predict in (('sklearn', model.predict), ('flat', flat.predict)):
+            predict(batch) # warm-up
+            start = time.perf_counter()
+            for _ in range(n_repeats):
+                predict(batch)
+            timings[name] = (time.perf_counter() - start) / n_repeats * 1000
+        results.append({
+            'batch_size': len(batch),
+            'sklearn_ms': timings['sklearn'],
+            'flat_ms': timings['flat'],
+            'speedup': timings['sklearn'] / timings['flat'],
+            'max_abs_diff': float(np.abs(model.predict(batch) - flat.predict(batch)).max()),
+        })
+    return results
+
+if __name__ == '__main__':
+    import warnings
+    from preprocessing import load_data, DataPreprocessor
+    from modeling import train_regression_model
+
+    warnings.filterwarnings('ignore', message='X does not have valid feature names')
+    df_processed = DataPreprocessor().fit_transform(load_data('data_rumah.xlsx', use_cache=False))
+    model, X_test, *_ = train_regression_model(df_processed)
+    for row in benchmark(model, X_test.to_numpy()):
+        print(f"batch={row['batch_size']:>4}  sklearn={row['sklearn_ms']:.3f} ms  flat={row['flat_ms']:.3f} ms  "
+              f"speedup={row['speedup']:.1f}x  max|diff|={row['max_abs_diff']:.3g}")
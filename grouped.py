@@ -0,0 +1,159 @@
+# grouped.py
+"""
+Model per grup (mis. per kondisi atau per wilayah) dengan pelatihan paralel dan router prediksi.
+
+Data yang sudah diproses dipartisi berdasarkan satu kolom kategorikal; setiap grup yang cukup
+besar mendapat RandomForestRegressor sendiri, dilatih paralel di process pool. Router mengirim
+setiap baris ke model grupnya, dan baris dari grup yang tidak dikenal/terlalu kecil ke model global.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from modeling import N_ESTIMATORS
+from registry import dataframe_fingerprint, model_key
+
+GLOBAL_GROUP = '__global__'
+
+class GroupedModelRouter:
+    """
+    Meneruskan prediksi ke model per grup berdasarkan nilai `group_column`.
+    Nilai grup yang tidak ada di tabel routing memakai model global (fallback).
+    `group_labels` memetakan nilai grup (kode hasil pra-pemrosesan) ke label kategori mentah.
+    """
+
+    def __init__(self, group_column, models, fallback, feature_columns, group_sizes=None,
+                 group_labels=None, categories=None):
+        self.group_column = group_column
+        self.models = models
+        self.fallback = fallback
+        self.feature_columns = list(feature_columns)
+        self.group_sizes = group_sizes or {}
+        self.group_labels = group_labels or {}
+        self.categories = list(categories or [])
+
+    @property
+    def routing_table(self):
+        """Tabel routing: label grup -> model yang dipakai (label grup itu sendiri, atau '__global__')."""
+        table = {str(label): GLOBAL_GROUP for label in self.categories}
+        for group in self.models:
+            label = str(self.group_labels.get(group, group))
+            table[label] = label
+        return table
+
+    def set_params(self, **params):
+        """Meneruskan parameter (mis. n_jobs=1 di worker batch) ke semua model grup dan model global."""
+        for model in [*self.models.values(), self.fallback]:
+            model.set_params(**params)
+        return self
+
+    def predict(self, X):
+        X = X[self.feature_columns] if hasattr(X, 'columns') else pd.DataFrame(X, columns=self.feature_columns)
+        groups = X[self.group_column].to_numpy()
+        predictions = np.empty(len(X), dtype=np.float64)
+        routed = np.zeros(len(X), dtype=bool)
+        # Satu panggilan predict per grup (bukan per baris)
+        for group in pd.unique(groups):
+            model = self.models.get(group)
+            if model is None:
+                continue
+            mask = groups == group
+            predictions[mask] = model.predict(X[mask])
+            routed |= mask
+        if not routed.all():
+            predictions[~routed] = self.fallback.predict(X[~routed])
+        return predictions
+
+def _group_labels(preprocessor, group_column, groups):
+    """Nilai grup (kode Label Encoding yang mungkin sudah diskala) -> label kategori mentah."""
+    categories = preprocessor.categories_.get(group_column) if preprocessor is not None else None
+    if not categories:
+        return {}
+    j = preprocessor.feature_columns_.index(group_column)
+    unscaled = getattr(preprocessor, 'compact', False) and preprocessor.output_dtypes_[group_column].kind == 'i'
+    labels = {}
+    for group in groups:
+        code = group if unscaled else group * preprocessor.scaler_.scale_[j] + preprocessor.scaler_.mean_[j]
+        code = int(round(float(code)))
+        if 0 <= code < len(categories):
+            labels[group] = categories[code]
+    return labels
+
+def _train_group(group, X, y, test_size, random_state, n_jobs):
+    """Melatih satu model (dijalankan di proses worker); mengembalikan model dan metrik hold-out."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score, mean_absolute_error
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+    model = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=random_state, n_jobs=n_jobs)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    metrics = {
+        'grup': group,
+        'n_baris': len(X),
+        'r2': r2_score(y_test, y_pred) if len(y_test) > 1 else float('nan'),
+        'mae': mean_absolute_error(y_test, y_pred),
+    }
+    return group, model, metrics
+
+def train_grouped_models(df, group_column, min_group_size=50, test_size=0.2, random_state=42, n_jobs=None,
+                         registry=None, preprocessor=None):
+    """
+    Melatih model per grup `group_column` secara paralel, plus model global sebagai fallback.
+
+    - min_group_size: grup dengan baris lebih sedikit tidak mendapat model sendiri (pakai global).
+    - n_jobs: anggaran core total; dibagi antara jumlah proses dan n_jobs tiap forest.
+    - registry: jika diisi, router (beserta tabel routing dan metriknya) disimpan di registry.
+    Mengembalikan (GroupedModelRouter, DataFrame metrik per grup).
+    """
+    if 'harga' not in df.columns:
+        raise KeyError("Kolom 'harga' (target) tidak ditemukan di DataFrame. Tidak bisa melatih model.")
+    if group_column not in df.columns:
+        raise KeyError(f"Kolom grup '{group_column}' tidak ditemukan di DataFrame.")
+
+    X = df.drop(columns=['harga'])
+    y = df['harga']
+    group_sizes = X[group_column].value_counts()
+    groups = [group for group, size in group_sizes.items() if size >= min_group_size]
+
+    core_budget = n_jobs if n_jobs and n_jobs > 0 else (os.cpu_count() or 1)
+    n_workers = max(1, min(core_budget, len(groups) + 1))
+    inner_jobs = max(1, core_budget // n_workers)
+
+    models, records = {}, []
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(_train_group, GLOBAL_GROUP, X, y, test_size, random_state, inner_jobs)]
+        for group in groups:
+            mask = X[group_column] == group
+            futures.append(executor.submit(_train_group, group, X[mask], y[mask], test_size, random_state, inner_jobs))
+        for future in futures:
+            group, model, metrics = future.result()
+            models[group] = model
+            records.append(metrics)
+
+    fallback = models.pop(GLOBAL_GROUP)
+    group_labels = _group_labels(preprocessor, group_column, models)
+    categories = preprocessor.categories_.get(group_column) if preprocessor is not None else None
+    router = GroupedModelRouter(group_column, models, fallback, X.columns, group_sizes.to_dict(),
+                                group_labels, categories)
+    metrics_df = pd.DataFrame(records)
+    metrics_df['grup'] = metrics_df['grup'].map(lambda group: group_labels.get(group, group))
+
+    if registry is not None:
+        params = {'model': 'GroupedRandomForest', 'group_column': group_column, 'min_group_size': min_group_size,
+                  'n_estimators': N_ESTIMATORS, 'test_size': test_size, 'random_state': random_state}
+        global_metrics = metrics_df[metrics_df['grup'] == GLOBAL_GROUP].iloc[0]
+        registry.save(model_key(dataframe_fingerprint(df), params), {
+            'model': router,
+            'preprocessor': preprocessor,
+            'feature_columns': X.columns.tolist(),
+            'metrics': {'r2': global_metrics['r2'], 'mae': global_metrics['mae']},
+            'params': params,
+            'routing_table': router.routing_table,
+            'group_metrics': metrics_df.to_dict('records'),
+        })
+    return router, metrics_df
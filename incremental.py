@@ -0,0 +1,184 @@
+# incremental.py
+"""
+Pembaruan model secara inkremental saat listing baru masuk (tanpa melatih ulang dari nol).
+
+Forest lama dipertahankan dan ditambah pohon baru yang dilatih pada data baru (warm_start).
+Statistik preprocessor diperbarui secara inkremental untuk pemantauan drift, tetapi
+transformasi (nilai pengisi, mean/scale scaler) sengaja dibekukan: pohon-pohon lama
+membuat split pada skala fitur lama, sehingga mengubah skala akan merusak prediksinya.
+Kategori baru ditambahkan di akhir kosakata agar kode kategori lama tidak bergeser.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from fast_forest import invalidate_compiled
+from prediction_cache import reset_model_version
+from preprocessing import clean_column_name, to_model_input
+from registry import dataframe_fingerprint, model_key
+from streaming import RunningMoments
+
+# Ambang drift bawaan
+MEAN_SHIFT_THRESHOLD = 0.5 # selisih rata-rata, dalam satuan standar deviasi referensi
+STD_RATIO_THRESHOLD = 2.0 # rasio standar deviasi baru / referensi (atau kebalikannya)
+CATEGORY_SHIFT_THRESHOLD = 0.2 # total variation distance proporsi kategori
+
+def _encoded_features(preprocessor, df):
+    """Fitur yang sudah diisi & di-encode, tetapi belum diskala (skala yang sama dengan statistik scaler)."""
+    column_map = {clean_column_name(col): col for col in df.columns}
+    return pd.DataFrame(preprocessor._encode(df, column_map), columns=preprocessor.feature_columns_, index=df.index)
+
+def detect_drift(preprocessor, df_new):
+    """
+    Membandingkan distribusi data baru dengan statistik referensi preprocessor.
+
+    Fitur numerik: pergeseran rata-rata (dalam std referensi) dan rasio standar deviasi.
+    Fitur kategorikal: total variation distance proporsi kategori dan porsi kategori yang belum dikenal.
+    Mengembalikan DataFrame satu baris per fitur dengan kolom `drift` (bool).
+    """
+    features = _encoded_features(preprocessor, df_new)
+    column_map = {clean_column_name(col): col for col in df_new.columns}
+    scaler = preprocessor.scaler_
+    reference_counts = getattr(preprocessor, 'category_counts_', {})
+    rows = []
+    for j, col in enumerate(preprocessor.feature_columns_):
+        if col in preprocessor.categories_ and col in reference_counts:
+            if col in column_map:
+                new_share = df_new[column_map[col]].dropna().astype(str).value_counts(normalize=True)
+            else:
+                new_share = pd.Series(dtype=float)
+            ref_share = pd.Series(reference_counts[col], dtype=float)
+            ref_share /= ref_share.sum()
+            shares = pd.concat([ref_share, new_share], axis=1).fillna(0.0)
+            distance = 0.5 * float(np.abs(shares.iloc[:, 0] - shares.iloc[:, 1]).sum())
+            unseen = float(new_share[~new_share.index.isin(ref_share.index)].sum())
+            rows.append({
+                'fitur': col, 'jenis': 'kategorikal', 'pergeseran': distance, 'kategori_baru': unseen,
+                'drift': distance > CATEGORY_SHIFT_THRESHOLD or unseen > 0,
+            })
+        else:
+            values = features[col].to_numpy()
+            ref_std = np.sqrt(scaler.var_[j])
+            # scale_ bernilai 1 untuk fitur konstan, sehingga pembagian tetap aman
+            mean_shift = abs(np.nanmean(values) - scaler.mean_[j]) / scaler.scale_[j] if len(values) else 0.0
+            new_std = np.nanstd(values) if len(values) else ref_std
+            if np.isclose(new_std, 0) and np.isclose(ref_std, 0):
+                std_ratio = 1.0
+            else:
+                std_ratio = max(new_std, 1e-12) / max(ref_std, 1e-12)
+                std_ratio = max(std_ratio, 1 / std_ratio)
+            rows.append({
+                'fitur': col, 'jenis': 'numerik', 'pergeseran': float(mean_shift), 'rasio_std': float(std_ratio),
+                'drift': mean_shift > MEAN_SHIFT_THRESHOLD or std_ratio > STD_RATIO_THRESHOLD,
+            })
+    return pd.DataFrame(rows)
+
+def _extend_schema(preprocessor, df_new, column_map):
+    """Baris yang sudah dipakai melatih model tidak boleh ditolak skema saat prediksi."""
+    schema = getattr(preprocessor, 'schema_', None)
+    if schema is None:
+        return
+    for col, spec in schema.columns.items():
+        if col not in column_map:
+            continue
+        if spec['kind'] == 'categorical':
+            # Urutan kosakata preprocessor: kategori baru ada di akhir
+            spec['categories'] = list(dict.fromkeys(spec['categories'] + list(preprocessor.categories_.get(col, []))))
+        else:
+            values = pd.to_numeric(df_new[column_map[col]], errors='coerce').dropna()
+            if len(values):
+                spec['min'] = float(values.min()) if spec.get('min') is None else min(spec['min'], float(values.min()))
+                spec['max'] = float(values.max()) if spec.get('max') is None else max(spec['max'], float(values.max()))
+
+def update_preprocessor_stats(preprocessor, df_new):
+    """
+    Memperbarui statistik preprocessor dengan data baru (in-place):
+    frekuensi kategori, kategori baru (ditambahkan di akhir kosakata), jumlah sampel,
+    dan rata-rata/varians berjalan di `running_stats_`. Transformasi scaler tidak diubah.
+    Skema validasi (`schema_`) ikut diperluas dengan kategori dan rentang nilai data baru.
+    """
+    column_map = {clean_column_name(col): col for col in df_new.columns}
+
+    if not hasattr(preprocessor, 'running_stats_'):
+        # Mulai dari statistik saat fit (mean/varians fitur yang belum diskala)
+        n_seen = getattr(preprocessor, 'n_samples_', int(np.max(preprocessor.scaler_.n_samples_seen_)))
+        preprocessor.running_stats_ = {}
+        for j, col in enumerate(preprocessor.feature_columns_):
+            stats = RunningMoments()
+            stats.merge_stats(n_seen, preprocessor.scaler_.mean_[j], preprocessor.scaler_.var_[j] * n_seen)
+            preprocessor.running_stats_[col] = stats
+
+    category_counts = getattr(preprocessor, 'category_counts_', None)
+    if category_counts is None:
+        category_counts = preprocessor.category_counts_ = {col: {} for col in preprocessor.categories_}
+    for col, vocabulary in preprocessor.categories_.items():
+        if col not in column_map:
+            continue
+        counts = df_new[column_map[col]].dropna().astype(str).value_counts()
+        for value, count in counts.items():
+            category_counts[col][value] = category_counts[col].get(value, 0) + int(count)
+            if value not in vocabulary:
+                vocabulary.append(value) # Kode baru = len(kosakata lama); kode lama tidak berubah
+
+    _extend_schema(preprocessor, df_new, column_map)
+
+    # Statistik berjalan dihitung setelah kosakata diperbarui agar kategori baru mendapat kode
+    features = _encoded_features(preprocessor, df_new)
+    for col, stats in preprocessor.running_stats_.items():
+        stats.update(features[col].to_numpy())
+    preprocessor.n_samples_ = getattr(preprocessor, 'n_samples_', 0) + len(df_new)
+    return preprocessor
+
+def update_regression_model(model, preprocessor, df_new, feature_columns=None, n_new_trees=None,
+                            max_trees=None, registry=None, parent_key=None, inplace=False):
+    """
+    Menambahkan pohon baru yang dilatih pada listing baru `df_new` (data mentah) ke forest lama.
+
+    - n_new_trees: jumlah pohon baru; default sebanding dengan porsi data baru terhadap
+      total data yang pernah dilihat (minimal 1), sehingga bobot data baru tetap proporsional.
+    - max_trees: jika diisi, pohon tertua dibuang agar ukuran forest tetap terbatas (jendela geser).
+    - registry: jika diisi, model baru disimpan dengan kunci turunan dari parent_key + data baru.
+    Model dan preprocessor disalin terlebih dahulu kecuali inplace=True.
+    Mengembalikan (model baru, preprocessor baru, laporan drift DataFrame).
+    """
+    if not inplace:
+        model, preprocessor = copy.deepcopy(model), copy.deepcopy(preprocessor)
+    # Versi model induk (registry_key_) tidak berlaku untuk forest yang diperbarui; registry.save memberi kunci baru
+    reset_model_version(model)
+    invalidate_compiled(model) # FlatForest lama tidak memuat pohon baru
+    feature_columns = feature_columns or preprocessor.feature_columns_
+
+    drift_report = detect_drift(preprocessor, df_new)
+    n_seen_before = getattr(preprocessor, 'n_samples_', None) or int(np.max(preprocessor.scaler_.n_samples_seen_))
+    update_preprocessor_stats(preprocessor, df_new)
+
+    processed = preprocessor.transform(df_new)
+    if 'harga' not in processed.columns:
+        raise KeyError("Kolom 'harga' (target) tidak ditemukan di data baru. Tidak bisa memperbarui model.")
+    X_new, y_new = processed[feature_columns], processed['harga']
+
+    if n_new_trees is None:
+        n_new_trees = max(1, round(model.n_estimators * len(df_new) / n_seen_before))
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new_trees)
+    if not hasattr(model, 'feature_names_in_'):
+        X_new = to_model_input(X_new) # Model dilatih dari matriks float32 (lihat train_regression_model)
+    model.fit(X_new, y_new) # warm_start: pohon lama dipertahankan, hanya pohon baru yang dilatih
+
+    if max_trees is not None and len(model.estimators_) > max_trees:
+        model.estimators_ = model.estimators_[-max_trees:]
+        model.set_params(n_estimators=max_trees)
+
+    if registry is not None:
+        params = {'update_of': parent_key, 'n_new_trees': n_new_trees, 'max_trees': max_trees}
+        key = model_key(dataframe_fingerprint(df_new), params)
+        registry.save(key, {
+            'model': model,
+            'preprocessor': preprocessor,
+            'feature_columns': list(feature_columns),
+            'metrics': {},
+            'params': params,
+            'drift': drift_report.to_dict('records'),
+        })
+    return model, preprocessor, drift_report
@@ -0,0 +1,236 @@
+# instrumentation.py
+"""
+Instrumentasi pipeline: timer per tahap (load, clean, impute, encode, scale, fit, predict, render),
+jumlah baris, dan puncak memori per tahap.
+
+    with stage('load') as s:
+        df = ...
+        s.rows = len(df)
+
+    @timed('fit')
+    def latih(...): ...
+
+Variabel lingkungan:
+- TUBES_METRICS_FILE: setiap catatan tahap ditambahkan sebagai satu baris JSON ke file ini.
+- TUBES_TRACE_MEMORY=1: puncak memori per tahap diukur dengan tracemalloc (ada overhead).
+  tracemalloc hanya melihat alokasi lewat alokator Python/NumPy; alokasi di ekstensi C
+  (mis. node pohon sklearn saat fit) tidak terhitung, sehingga `peak_mb` tahap 'fit' jauh
+  di bawah memori sebenarnya. Untuk puncak RSS yang lengkap, pakai benchmark.measure.
+- TUBES_PROFILE=cprofile|pyinstrument: tahap terluar diprofil, hasilnya disimpan di TUBES_PROFILE_DIR.
+"""
+
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.environ.get('TUBES_METRICS_FILE')
+PROFILE_MODE = os.environ.get('TUBES_PROFILE', '').lower()
+PROFILE_DIR = os.environ.get('TUBES_PROFILE_DIR', os.path.join('.cache', 'profiles'))
+MAX_RECORDS = 10_000 # Catatan terbaru yang disimpan di memori
+
+_records = deque(maxlen=MAX_RECORDS)
+_records_lock = threading.Lock()
+_thread_local = threading.local()
+# Daftar pengumpul aktif (lihat capture_stages); ikut disalin ke render pool lewat contextvars
+_collectors = contextvars.ContextVar('tubes_stage_collectors', default=())
+
+if os.environ.get('TUBES_TRACE_MEMORY') == '1':
+    tracemalloc.start()
+
+def enable_memory_tracking(enabled=True):
+    """Menyalakan/mematikan pengukuran puncak memori (tracemalloc) untuk tahap berikutnya."""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+class Stage:
+    """Handle tahap yang sedang berjalan; `rows` boleh diisi di dalam blok with."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.child_peak = 0
+
+def _stack():
+    stack = getattr(_thread_local, 'stack', None)
+    if stack is None:
+        stack = _thread_local.stack = []
+    return stack
+
+def _start_profiler():
+    if PROFILE_MODE == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("TUBES_PROFILE=pyinstrument tetapi pyinstrument tidak terpasang; memakai cProfile.")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def _stop_profiler(profiler, name):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    if hasattr(profiler, 'output_html'): # pyinstrument
+        profiler.stop()
+        path = os.path.join(PROFILE_DIR, f'{name}-{stamp}.html')
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f'{name}-{stamp}.prof')
+        profiler.dump_stats(path)
+    logger.info("Profil tahap '%s' disimpan di %s", name, path)
+
+def _record(entry):
+    with _records_lock:
+        _records.append(entry)
+    for collector in _collectors.get():
+        collector.append(entry)
+    if METRICS_FILE:
+        with open(METRICS_FILE, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+@contextlib.contextmanager
+def stage(name, rows=None):
+    """
+    Context manager yang mencatat durasi, jumlah baris (`rows`, atau diisi lewat handle),
+    dan puncak memori tahap `name`. Tahap bisa bersarang; puncak tahap luar mencakup tahap dalam.
+    Puncak memori berasal dari tracemalloc (batas bawah: alokasi di ekstensi C tidak terlihat).
+    """
+    handle = Stage(name, rows)
+    stack = _stack()
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        start_current, outer_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    profiler = _start_profiler() if PROFILE_MODE and not stack else None
+    stack.append(handle)
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        if profiler is not None:
+            _stop_profiler(profiler, name)
+        peak_mb = None
+        if tracing and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], handle.child_peak)
+            peak_mb = (peak - start_current) / 2 ** 20
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak, outer_peak)
+        _record({
+            'stage': name,
+            'seconds': seconds,
+            'rows': handle.rows,
+            'peak_mb': peak_mb,
+            'parent': stack[-1].name if stack else None,
+            'timestamp': time.time(),
+        })
+
+def _infer_rows(result):
+    """Jumlah baris dari hasil fungsi: len() hasil, atau elemen pertama jika hasilnya tuple."""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+def timed(name, rows=_infer_rows):
+    """Decorator versi stage(); `rows(hasil)` menentukan jumlah baris yang dicatat."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name) as handle:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    handle.rows = rows(result)
+                return result
+        return wrapper
+    return decorator
+
+@contextlib.contextmanager
+def capture_stages():
+    """Mengumpulkan catatan tahap yang terjadi di dalam blok ini (termasuk di render pool) ke sebuah list."""
+    captured = []
+    token = _collectors.set(_collectors.get() + (captured,))
+    try:
+        yield captured
+    finally:
+        _collectors.reset(token)
+
+def get_records():
+    """Salinan catatan tahap terbaru (paling lama di depan)."""
+    with _records_lock:
+        return list(_records)
+
+def reset_metrics():
+    with _records_lock:
+        _records.clear()
+
+def summarize(records=None):
+    """Ringkasan per tahap: jumlah panggilan, total/rata-rata/maks detik, total baris, puncak memori."""
+    records = get_records() if records is None else records
+    columns = ['stage', 'calls', 'total_seconds', 'mean_seconds', 'max_seconds', 'rows', 'peak_mb']
+    if not records:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame(records)
+    summary = frame.groupby('stage', sort=False).agg(
+        calls=('seconds', 'size'),
+        total_seconds=('seconds', 'sum'),
+        mean_seconds=('seconds', 'mean'),
+        max_seconds=('seconds', 'max'),
+        rows=('rows', 'sum'),
+        peak_mb=('peak_mb', 'max'),
+    )
+    return summary.reset_index()[columns]
+
+def to_prometheus(records=None, prefix='tubes'):
+    """Ringkasan tahap dalam format teks eksposisi Prometheus."""
+    summary = summarize(records)
+    metrics = [
+        ('stage_calls_total', 'counter', 'Jumlah eksekusi tahap', 'calls'),
+        ('stage_seconds_total', 'counter', 'Total waktu tahap (detik)', 'total_seconds'),
+        ('stage_seconds_max', 'gauge', 'Waktu eksekusi tahap terlama (detik)', 'max_seconds'),
+        ('stage_rows_total', 'counter', 'Total baris yang diproses tahap', 'rows'),
+        ('stage_peak_memory_megabytes', 'gauge', 'Puncak memori tahap (MB, tracemalloc; tanpa alokasi ekstensi C)', 'peak_mb'),
+    ]
+    lines = []
+    for metric, metric_type, help_text, column in metrics:
+        name = f'{prefix}_{metric}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for _, row in summary.iterrows():
+            if pd.notna(row[column]):
+                lines.append(f'{name}{{stage="{row["stage"]}"}} {float(row[column]):.6g}')
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(path, records=None, format='prometheus'):
+    """Menulis metrik ke file: 'prometheus' (teks eksposisi) atau 'json' (catatan mentah)."""
+    records = get_records() if records is None else records
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        if format == 'json':
+            json.dump(records, f, indent=2)
+        else:
+            f.write(to_prometheus(records))
+    os.replace(tmp_path, path)
+    return path
@@ -1,18 +1,36 @@
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 import numpy as np
-import streamlit as st # Diperlukan untuk st.error/warning
+from registry import dataframe_fingerprint, model_key
+from fast_forest import compile_forest
+from preprocessing import to_model_input
+from instrumentation import stage
+from reporting import report_error, report_warning
 
-def train_regression_model(df, test_size=0.2, random_state=42):
+N_ESTIMATORS = 100
+# Batas jumlah baris di mana FlatForest lebih cepat daripada predict bawaan sklearn
+FLAT_FOREST_MAX_ROWS = 256
+
+def model_predict(model, X):
+    """
+    model.predict dengan input float32 C-contiguous (tanpa konversi ulang di dalam sklearn).
+    Model lama yang dilatih langsung dari DataFrame (punya feature_names_in_) tetap diberi DataFrame.
+    """
+    if hasattr(model, 'feature_names_in_') or not hasattr(model, 'estimators_'):
+        return model.predict(X)
+    return model.predict(to_model_input(X))
+
+def train_regression_model(df, test_size=0.2, random_state=42, registry=None, preprocessor=None, data_fingerprint=None):
     """
     Melatih model regresi (RandomForestRegressor) untuk memprediksi harga rumah.
     Mengembalikan model yang dilatih, data uji, prediksi, dan metrik evaluasi.
+
+    Jika `registry` diberikan, model disimpan (bersama preprocessor, kolom fitur, dan metrik)
+    dengan kunci hash(fingerprint data + hyperparameter). Permintaan pelatihan dengan kunci
+    yang sudah ada langsung dilayani dari registry tanpa melatih ulang.
     """
     # Pastikan kolom target 'harga' ada
     if 'harga' not in df.columns:
-        st.error("Kolom 'harga' (target) tidak ditemukan di DataFrame. Tidak bisa melatih model.")
+        report_error("Kolom 'harga' (target) tidak ditemukan di DataFrame. Tidak bisa melatih model.")
         return None, None, None, None, None
 
     # Pisahkan fitur (X) dan target (y)
@@ -22,18 +40,34 @@ def train_regression_model(df, test_size=0.2, random_state=42):
 
     # Pastikan X tidak kosong setelah drop 'harga'
     if X.empty:
-        st.error("Tidak ada fitur yang tersisa untuk melatih model setelah menghapus kolom target.")
+        report_error("Tidak ada fitur yang tersisa untuk melatih model setelah menghapus kolom target.")
         return None, None, None, None, None
 
+    params = {'model': 'RandomForestRegressor', 'n_estimators': N_ESTIMATORS, 'test_size': test_size, 'random_state': random_state}
+    if registry is not None:
+        key = model_key(data_fingerprint or dataframe_fingerprint(df), params)
+        if registry.has(key):
+            artifact = registry.load(key)
+            evaluation = artifact['evaluation']
+            return artifact['model'], evaluation['X_test'], evaluation['y_test'], evaluation['y_pred'], artifact['metrics']
+
+    # sklearn diimpor saat pelatihan saja agar impor modul ini tetap ringan
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+
     # Bagi data menjadi set pelatihan dan pengujian
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
     # Inisialisasi dan latih model Random Forest Regressor
-    model = RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=-1) # n_jobs=-1 untuk parallel processing
-    model.fit(X_train, y_train)
+    model = RandomForestRegressor(n_estimators=N_ESTIMATORS, random_state=random_state, n_jobs=-1) # n_jobs=-1 untuk parallel processing
+    # Forest dilatih dari matriks float32 contiguous, bukan DataFrame (lebih hemat memori dan cache-friendly)
+    with stage('fit', rows=len(X_train)):
+        model.fit(to_model_input(X_train), y_train.to_numpy())
 
     # Buat prediksi pada data uji
-    y_pred = model.predict(X_test)
+    with stage('predict', rows=len(X_test)):
+        y_pred = model_predict(model, X_test)
 
     # Hitung metrik evaluasi
     r2 = r2_score(y_test, y_pred)
@@ -48,18 +82,34 @@ def train_regression_model(df, test_size=0.2, random_state=42):
         'rmse': rmse
     }
 
+    if registry is not None:
+        registry.save(key, {
+            'model': model,
+            'preprocessor': preprocessor,
+            'feature_columns': X.columns.tolist(),
+            'metrics': metrics,
+            'params': params,
+            'evaluation': {'X_test': X_test, 'y_test': y_test, 'y_pred': y_pred},
+        })
+
     return model, X_test, y_test, y_pred, metrics
 
-def make_regression_prediction(model, new_data_df_scaled):
+def make_regression_prediction(model, new_data_df_scaled, engine='auto'):
     """Membuat prediksi harga rumah menggunakan model yang sudah dilatih.
        Diasumsikan new_data_df_scaled sudah diskala.
+       engine='auto' memakai FlatForest (tanpa dispatch thread pool) untuk input kecil,
+       'flat' selalu memakai FlatForest, dan 'sklearn' selalu memakai model.predict.
     """
     if model:
         try:
-            prediction = model.predict(new_data_df_scaled)
+            use_flat = engine == 'flat' or (engine == 'auto' and len(new_data_df_scaled) <= FLAT_FOREST_MAX_ROWS)
+            with stage('predict', rows=len(new_data_df_scaled)):
+                if use_flat and hasattr(model, 'estimators_'):
+                    return compile_forest(model).predict(new_data_df_scaled)
+                prediction = model_predict(model, new_data_df_scaled)
             return prediction
         except Exception as e:
-            st.error(f"Error saat membuat prediksi: {e}. Pastikan format dan skala input sesuai.")
+            report_error(f"Error saat membuat prediksi: {e}. Pastikan format dan skala input sesuai.")
             return None
-    st.warning("Model belum dilatih untuk membuat prediksi.")
+    report_warning("Model belum dilatih untuk membuat prediksi.")
     return None
\ No newline at end of file
@@ -0,0 +1,187 @@
+# out_of_core.py
+"""
+Pelatihan out-of-core: fitur hasil pra-pemrosesan ditulis sekali ke array di disk
+(NumPy .npy yang dibuka sebagai memmap), lalu forest dilatih langsung dari memmap tersebut.
+
+Setiap baris diberi label train/test secara acak (mask tetap dari random_state) dan ditulis
+berurutan ke salah satu dari dua wilayah file: data latih di depan, data uji di belakang.
+Penulisan tetap sekuensial (dua kursor append), dan split train/test cukup berupa slice
+X[:n_train] dan X[n_train:], yaitu view tanpa salinan.
+Dengan max_samples, setiap pohon hanya memakai subsampel bootstrap dari memmap.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from instrumentation import stage
+from preprocessing import to_model_input
+from registry import dataframe_fingerprint, model_key, preprocessor_fingerprint
+from streaming import DEFAULT_CHUNKSIZE, count_rows, fit_preprocessor_chunked, iter_chunks
+
+FEATURE_STORE_DIR = os.environ.get('TUBES_FEATURE_STORE_DIR', os.path.join('.cache', 'features'))
+PREDICT_CHUNK_ROWS = 100_000
+
+def _iter_processed_chunks(source, preprocessor, chunksize):
+    """Chunk data yang sudah diproses, dari file mentah (CSV/Parquet) atau DataFrame hasil pra-pemrosesan."""
+    if isinstance(source, str):
+        for chunk in iter_chunks(source, chunksize):
+            yield preprocessor.transform(chunk)
+    else:
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+
+def write_feature_store(source, directory=None, preprocessor=None, chunksize=DEFAULT_CHUNKSIZE,
+                        test_size=0.2, random_state=42, target='harga'):
+    """
+    Menulis fitur (float32) dan target (float64) ke `directory`/X.npy dan y.npy per chunk.
+
+    - source: path CSV/Parquet mentah (diproses per chunk dengan `preprocessor`; jika tidak
+      diberikan, preprocessor di-fit secara streaming), atau DataFrame yang sudah diproses.
+    - Setiap baris masuk data uji dengan peluang test_size; baris latih ditulis berurutan
+      mulai dari awal file dan baris uji mulai dari posisi n_train.
+    - directory default diturunkan dari fingerprint sumber, fingerprint preprocessor, test_size
+      dan random_state, sehingga sumber atau pra-pemrosesan berbeda tidak saling menimpa store.
+    Mengembalikan metadata store (dict) yang juga disimpan sebagai meta.json.
+    """
+    if isinstance(source, str):
+        if preprocessor is None:
+            preprocessor = fit_preprocessor_chunked(source, chunksize, target=target)
+            n_rows = preprocessor.n_samples_
+        else:
+            # Preprocessor dari luar bisa di-fit pada data lain (sampel, pembaruan inkremental)
+            n_rows = count_rows(source, chunksize)
+        feature_columns = list(preprocessor.feature_columns_)
+    else:
+        n_rows = len(source)
+        feature_columns = [col for col in source.columns if col != target]
+
+    fingerprint = None # Hanya sumber berupa file yang punya fingerprint stabil (untuk kunci registry)
+    if isinstance(source, str):
+        stat = os.stat(source)
+        fingerprint = f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+    preprocessing = preprocessor_fingerprint(preprocessor)
+    if directory is None:
+        store_key = model_key(fingerprint or dataframe_fingerprint(source),
+                              {'test_size': test_size, 'random_state': random_state, 'preprocessor': preprocessing})
+        directory = os.path.join(FEATURE_STORE_DIR, store_key)
+    os.makedirs(directory, exist_ok=True)
+
+    # Mask uji dibuat per potongan (1 byte per baris) agar n_train diketahui sebelum penulisan
+    rng = np.random.default_rng(random_state)
+    is_test = np.empty(n_rows, dtype=bool)
+    for start in range(0, n_rows, chunksize):
+        is_test[start:start + chunksize] = rng.random(min(chunksize, n_rows - start)) < test_size
+    n_train = n_rows - int(is_test.sum())
+
+    X = np.lib.format.open_memmap(os.path.join(directory, 'X.npy'), mode='w+', dtype=np.float32, shape=(n_rows, len(feature_columns)))
+    y = np.lib.format.open_memmap(os.path.join(directory, 'y.npy'), mode='w+', dtype=np.float64, shape=(n_rows,))
+
+    offset = 0
+    cursors = [0, n_train] # Posisi tulis berikutnya di wilayah latih dan wilayah uji
+    with stage('write_features', rows=n_rows):
+        for chunk in _iter_processed_chunks(source, preprocessor, chunksize):
+            if offset + len(chunk) > n_rows:
+                offset += len(chunk) # Lebih banyak baris dari lintasan fit: hentikan, dilaporkan di bawah
+                break
+            chunk_test = is_test[offset:offset + len(chunk)]
+            features = to_model_input(chunk, feature_columns)
+            target_values = chunk[target].to_numpy(dtype=np.float64)
+            for region, mask in enumerate((~chunk_test, chunk_test)):
+                start, end = cursors[region], cursors[region] + int(mask.sum())
+                X[start:end] = features[mask]
+                y[start:end] = target_values[mask]
+                cursors[region] = end
+            offset += len(chunk)
+    if offset != n_rows:
+        raise ValueError(f"Jumlah baris berubah saat penulisan ({offset} dari {n_rows}); sumber data berubah?")
+    X.flush()
+    y.flush()
+    del X, y
+
+    meta = {
+        'n_rows': n_rows,
+        'n_train': n_train,
+        'feature_columns': feature_columns,
+        'test_size': test_size,
+        'random_state': random_state,
+        'source': fingerprint,
+        'preprocessor': preprocessing,
+    }
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return dict(meta, directory=directory, preprocessor=preprocessor)
+
+def open_feature_store(directory):
+    """Membuka store sebagai memmap read-only; mengembalikan (X_train, X_test, y_train, y_test, meta) berupa view."""
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    X = np.load(os.path.join(directory, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(directory, 'y.npy'), mmap_mode='r')
+    n_train = meta['n_train']
+    return X[:n_train], X[n_train:], y[:n_train], y[n_train:], meta
+
+def _predict_chunked(model, X, chunk_rows=PREDICT_CHUNK_ROWS):
+    """Prediksi per potongan agar tidak ada salinan penuh dari X uji di memori."""
+    predictions = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), chunk_rows):
+        predictions[start:start + chunk_rows] = model.predict(X[start:start + chunk_rows])
+    return predictions
+
+def train_regression_model_memmap(directory, n_estimators=None, max_samples=None, random_state=42, n_jobs=-1,
+                                  registry=None, preprocessor=None):
+    """
+    Melatih RandomForestRegressor langsung dari feature store di disk (lihat write_feature_store).
+
+    - max_samples: jumlah (int) atau porsi (float) baris bootstrap per pohon; membatasi kerja
+      per pohon untuk data yang sangat besar. None = seluruh data latih.
+    - preprocessor: disimpan bersama model; harus sama dengan preprocessor penulis store.
+    Mengembalikan (model, X_test, y_test, y_pred, metrics) seperti train_regression_model;
+    X_test dan y_test adalah view memmap.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+    from modeling import N_ESTIMATORS
+
+    X_train, X_test, y_train, y_test, meta = open_feature_store(directory)
+    preprocessing = meta.get('preprocessor')
+    if preprocessing is not None and preprocessor is not None and preprocessor_fingerprint(preprocessor) != preprocessing:
+        raise ValueError("Preprocessor berbeda dengan yang dipakai saat menulis feature store; tulis ulang store-nya.")
+    n_estimators = n_estimators or N_ESTIMATORS
+    params = {'model': 'RandomForestRegressor', 'n_estimators': n_estimators, 'max_samples': max_samples,
+              'test_size': meta['test_size'], 'split_random_state': meta['random_state'],
+              'random_state': random_state, 'out_of_core': True, 'preprocessor': preprocessing}
+
+    key = None
+    if registry is not None and meta.get('source'):
+        key = model_key(meta['source'], params)
+        if registry.has(key):
+            artifact = registry.load(key)
+            return artifact['model'], X_test, y_test, artifact['evaluation']['y_pred'], artifact['metrics']
+
+    model = RandomForestRegressor(n_estimators=n_estimators, max_samples=max_samples,
+                                  random_state=random_state, n_jobs=n_jobs)
+    with stage('fit', rows=len(X_train)):
+        model.fit(X_train, y_train) # memmap float32 C-contiguous: sklearn tidak menyalinnya
+    with stage('predict', rows=len(X_test)):
+        y_pred = _predict_chunked(model, X_test)
+
+    mse = mean_squared_error(y_test, y_pred)
+    metrics = {
+        'r2': r2_score(y_test, y_pred),
+        'mae': mean_absolute_error(y_test, y_pred),
+        'mse': mse,
+        'rmse': np.sqrt(mse),
+    }
+
+    if key is not None:
+        registry.save(key, {
+            'model': model,
+            'preprocessor': preprocessor,
+            'feature_columns': meta['feature_columns'],
+            'metrics': metrics,
+            'params': params,
+            'evaluation': {'y_pred': y_pred, 'feature_store': directory},
+        })
+    return model, X_test, y_test, y_pred, metrics
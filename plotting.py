@@ -0,0 +1,133 @@
+# plotting.py
+"""
+Subsistem rendering plot yang hemat memori untuk server Streamlit yang berjalan lama.
+
+- Tidak memakai pyplot: figure dibuat dengan matplotlib.figure.Figure + canvas Agg, sehingga
+  tidak ada figure yang tertinggal di registry global pyplot.
+- Rendering berjalan di thread pool (di luar thread request). Setiap thread worker memakai
+  ulang satu objek Figure yang dibersihkan setelah setiap render.
+- Gambar hasil render (bytes PNG/SVG) di-cache dengan kunci hash data input (LRU terbatas).
+"""
+
+import contextvars
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# Matplotlib tidak menjamin thread-safety; default satu worker (tetap di luar thread request)
+RENDER_WORKERS = int(os.environ.get('TUBES_RENDER_WORKERS', '1'))
+IMAGE_CACHE_SIZE = 64
+MAX_SCATTER_POINTS = 5_000
+
+_render_pool = None
+_pool_lock = threading.Lock()
+_thread_local = threading.local()
+_image_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def hash_data(*objects):
+    """Hash isi data (DataFrame/Series/array/nilai biasa) untuk kunci cache gambar."""
+    hasher = hashlib.sha256()
+    for obj in objects:
+        if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            hasher.update(pd.util.hash_pandas_object(obj, index=False).to_numpy().tobytes())
+            if isinstance(obj, pd.DataFrame):
+                hasher.update('|'.join(map(str, obj.columns)).encode())
+        elif isinstance(obj, np.ndarray) and obj.dtype != object:
+            hasher.update(np.ascontiguousarray(obj).tobytes())
+        else:
+            hasher.update(repr(obj).encode())
+        hasher.update(b'\0')
+    return hasher.hexdigest()[:20]
+
+def downsample_indices(n, max_points=MAX_SCATTER_POINTS, random_state=0):
+    """Indeks sampel acak (terurut) jika n melebihi max_points; None jika tidak perlu downsampling."""
+    if n <= max_points:
+        return None
+    return np.sort(np.random.default_rng(random_state).choice(n, size=max_points, replace=False))
+
+def new_figure(figsize=(10, 6)):
+    """Figure baru berbasis canvas Agg (tanpa pyplot, tidak perlu plt.close)."""
+    # matplotlib diimpor saat figure pertama dibuat, bukan saat modul ini diimpor
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+def figure_to_bytes(fig, image_format='png'):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=image_format, bbox_inches='tight')
+    return buffer.getvalue()
+
+def _get_pool():
+    global _render_pool
+    with _pool_lock:
+        if _render_pool is None:
+            _render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='render')
+        return _render_pool
+
+def _render(draw_fn, args, kwargs, figsize, image_format):
+    # Satu Figure per thread worker, dipakai ulang dan dibersihkan setiap selesai render
+    fig = getattr(_thread_local, 'figure', None)
+    if fig is None:
+        fig = _thread_local.figure = new_figure(figsize)
+    fig.set_size_inches(figsize)
+    try:
+        with stage('render'):
+            draw_fn(fig, *args, **kwargs)
+            return figure_to_bytes(fig, image_format)
+    finally:
+        fig.clear()
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key]
+    return None
+
+def _cache_put(key, image):
+    with _cache_lock:
+        _image_cache[key] = image
+        _image_cache.move_to_end(key)
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+
+def submit_render(draw_fn, *args, figsize=(10, 6), image_format='png', cache_key=None, **kwargs):
+    """
+    Menjadwalkan draw_fn(fig, *args, **kwargs) di render pool; mengembalikan Future berisi bytes gambar.
+    Dengan cache_key, gambar yang sudah pernah dirender langsung dikembalikan dari cache.
+    """
+    full_key = None
+    if cache_key is not None:
+        full_key = (f"{getattr(draw_fn, '__module__', '')}.{getattr(draw_fn, '__qualname__', repr(draw_fn))}", cache_key, tuple(figsize), image_format)
+        cached = _cache_get(full_key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+    # Konteks pemanggil ikut dibawa agar catatan tahap 'render' sampai ke capture_stages() pemanggil
+    context = contextvars.copy_context()
+    future = _get_pool().submit(context.run, _render, draw_fn, args, kwargs, figsize, image_format)
+    if full_key is not None:
+        future.add_done_callback(lambda f: f.exception() is None and _cache_put(full_key, f.result()))
+    return future
+
+def render_image(draw_fn, *args, figsize=(10, 6), image_format='png', cache_key=None, **kwargs):
+    """Versi sinkron submit_render: menunggu dan mengembalikan bytes gambar."""
+    return submit_render(draw_fn, *args, figsize=figsize, image_format=image_format, cache_key=cache_key, **kwargs).result()
+
+def clear_image_cache():
+    with _cache_lock:
+        _image_cache.clear()
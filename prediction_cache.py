@@ -0,0 +1,244 @@
+# prediction_cache.py
+"""
+Cache prediksi untuk listing yang berulang (mis. kombinasi form yang sama di app.py).
+
+Kunci = hash vektor fitur mentah yang dikanonikalkan (nama kolom bersih, angka sebagai float,
+teks tanpa spasi tepi) + versi model. Cache di memori dibatasi ukurannya (LRU) dan umurnya (TTL).
+Saat versi model berganti (model baru dilatih/dimuat), entri versi lama dibuang otomatis.
+Opsional: store SQLite lokal agar cache bisa dipakai bersama oleh beberapa proses worker.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import clean_column_name
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL = 3600.0 # detik
+PREDICTION_CACHE_DB = os.environ.get('TUBES_PREDICTION_CACHE_DB') # Kosong = tanpa store disk
+
+_model_versions = weakref.WeakKeyDictionary()
+
+def model_version(model):
+    """
+    Versi model untuk kunci cache: kunci registry jika model berasal dari registry
+    (stabil lintas proses), jika tidak, id acak yang unik per objek model.
+    """
+    key = getattr(model, 'registry_key_', None)
+    if key is not None:
+        return key
+    try:
+        if model not in _model_versions:
+            _model_versions[model] = uuid.uuid4().hex[:16]
+        return _model_versions[model]
+    except TypeError: # Objek yang tidak mendukung weakref
+        return f"id-{id(model)}"
+
+def reset_model_version(model):
+    """Model diubah di tempat (mis. pohon baru ditambahkan): berikan versi baru agar cache lama tidak dipakai."""
+    if hasattr(model, 'registry_key_'):
+        del model.registry_key_
+    try:
+        _model_versions.pop(model, None)
+    except TypeError:
+        pass
+
+def feature_keys(df):
+    """Kunci kanonis per baris (vektor, tanpa loop per baris): urutan kolom dan format angka tidak berpengaruh."""
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            values = values.astype(np.float64) # 3 dan 3.0 menjadi kunci yang sama
+        else:
+            values = values.astype(str).str.strip().where(values.notna())
+        columns[clean_column_name(col)] = values.reset_index(drop=True)
+    canonical = pd.DataFrame({col: columns[col] for col in sorted(columns)})
+    # Dua hash 64-bit dengan kunci berbeda -> 128 bit, peluang tabrakan dapat diabaikan
+    first = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    second = pd.util.hash_pandas_object(canonical, index=False, hash_key='tubes-prediksi01').to_numpy()
+    prefix = '|'.join(canonical.columns)
+    return [f"{prefix}:{a:016x}{b:016x}" for a, b in zip(first, second)]
+
+class _DiskStore:
+    """Store SQLite (mode WAL) yang bisa dibuka bersamaan oleh beberapa proses."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self.path = path
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, version TEXT, value REAL, expires REAL)'
+        )
+        connection.commit()
+
+    def _connection(self):
+        # Koneksi SQLite tidak boleh dipakai lintas thread: satu koneksi per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = sqlite3.connect(self.path, timeout=5.0)
+        return connection
+
+    def get_many(self, keys, now):
+        found = {}
+        connection = self._connection()
+        for start in range(0, len(keys), 500): # Batas jumlah parameter SQLite
+            part = keys[start:start + 500]
+            rows = connection.execute(
+                f"SELECT key, value FROM predictions WHERE expires > ? AND key IN ({','.join('?' * len(part))})",
+                [now, *part],
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def put_many(self, items, version, expires):
+        connection = self._connection()
+        connection.executemany(
+            'INSERT OR REPLACE INTO predictions (key, version, value, expires) VALUES (?, ?, ?, ?)',
+            [(key, version, value, expires) for key, value in items],
+        )
+        connection.commit()
+
+    def delete_other_versions(self, version):
+        connection = self._connection()
+        if version is None:
+            connection.execute('DELETE FROM predictions')
+        else:
+            connection.execute('DELETE FROM predictions WHERE version != ? OR expires <= ?', (version, time.time()))
+        connection.commit()
+
+class PredictionCache:
+    """
+    Cache LRU + TTL untuk hasil prediksi, dengan statistik hit-rate.
+
+        cache = PredictionCache(max_entries=10_000, ttl=3600)
+        prediksi = cache.predict(df_mentah, model_version(model), fungsi_prediksi)
+
+    `fungsi_prediksi(df_mentah_miss)` hanya dipanggil sekali per batch untuk baris yang belum ada di cache.
+    Jika fungsi_prediksi mengembalikan None (prediksi gagal), tidak ada yang disimpan dan hasilnya None.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, disk_path=PREDICTION_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict() # kunci -> (prediksi, waktu kedaluwarsa)
+        self._lock = threading.Lock()
+        self._version = None
+        self._disk = _DiskStore(disk_path) if disk_path else None
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+
+    def _set_version(self, version):
+        """Versi model berganti -> entri lama tidak berlaku lagi."""
+        with self._lock:
+            if version == self._version:
+                return
+            changed = self._version is not None
+            self._version = version
+            if changed:
+                self._entries.clear()
+                self._stats['invalidations'] += 1
+        if changed and self._disk is not None:
+            self._disk.delete_other_versions(version)
+
+    def invalidate(self):
+        """Mengosongkan cache (memori dan disk), mis. setelah model dilatih ulang."""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._stats['invalidations'] += 1
+        if self._disk is not None:
+            self._disk.delete_other_versions(None)
+
+    def _lookup(self, keys, now):
+        results = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[1] <= now:
+                    del self._entries[key]
+                    self._stats['expired'] += 1
+                    continue
+                self._entries.move_to_end(key)
+                results[key] = entry[0]
+        return results
+
+    def _store(self, items, expires):
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def predict(self, df, version, predict_fn):
+        """Prediksi untuk setiap baris df: diambil dari cache bila ada, sisanya diprediksi dalam satu panggilan."""
+        self._set_version(version)
+        now = time.time()
+        keys = [f"{version}/{key}" for key in feature_keys(df)]
+        found = self._lookup(set(keys), now)
+
+        missing_keys = [key for key in dict.fromkeys(keys) if key not in found]
+        disk_hits = 0
+        if missing_keys and self._disk is not None:
+            from_disk = self._disk.get_many(missing_keys, now)
+            disk_hits = len(from_disk)
+            found.update(from_disk)
+            self._store(from_disk.items(), now + self.ttl)
+            missing_keys = [key for key in missing_keys if key not in from_disk]
+
+        missing = set(missing_keys)
+        if missing:
+            # Satu baris perwakilan per kunci yang belum ada (duplikat dalam batch cukup diprediksi sekali)
+            positions = {}
+            for position, key in enumerate(keys):
+                if key in missing and key not in positions:
+                    positions[key] = position
+            predictions = predict_fn(df.iloc[list(positions.values())])
+            if predictions is None:
+                return None
+            predictions = np.asarray(predictions, dtype=np.float64)
+            new_items = list(zip(positions, predictions.tolist()))
+            found.update(new_items)
+            self._store(new_items, now + self.ttl)
+            if self._disk is not None:
+                self._disk.put_many(new_items, version, now + self.ttl)
+
+        # Statistik per baris: baris yang kuncinya harus diprediksi model dihitung sebagai miss
+        missed_rows = sum(1 for key in keys if key in missing) if missing else 0
+        with self._lock:
+            self._stats['hits'] += len(keys) - missed_rows
+            self._stats['disk_hits'] += disk_hits
+            self._stats['misses'] += missed_rows
+        return np.array([found[key] for key in keys], dtype=np.float64)
+
+    def stats(self):
+        """Statistik cache: hits (termasuk dari disk), misses, hit_rate, ukuran, evictions, expired."""
+        with self._lock:
+            stats = dict(self._stats, size=len(self._entries), max_entries=self.max_entries, ttl=self.ttl)
+        total = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / total if total else 0.0
+        return stats
+
+_default_cache = None
+
+def get_prediction_cache():
+    """Cache prediksi bawaan (satu instance per proses)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PredictionCache()
+    return _default_cache
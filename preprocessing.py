@@ -2,90 +2,401 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-import streamlit as st # Diperlukan untuk st.error/warning
-import os # Diperlukan untuk debugging path
-
-# Inisialisasi scaler di level global (sesuai implementasi Anda)
-global_scaler = StandardScaler()
-
-def load_data(filepath):
-    """Memuat dataset dari file Excel."""
-    # --- BAGIAN DEBUGGING PATH (bisa dihapus nanti jika sudah fix) ---
-    current_dir = os.getcwd()
-    st.error(f"DEBUG: Direktori kerja saat ini: {current_dir}")
-    files_in_dir = os.listdir(current_dir)
-    st.error(f"DEBUG: File di direktori ini: {', '.join(files_in_dir)}")
-    # --- AKHIR BAGIAN DEBUGGING PATH ---
+import os
+import glob
+import hashlib
+import functools
+import re
 
+from instrumentation import stage
+from reporting import report_error, report_warning
+
+# --- Cache data mentah ---
+# Direktori cache kolumnar (Parquet) hasil konversi file Excel/CSV
+DATA_CACHE_DIR = os.environ.get('TUBES_CACHE_DIR', os.path.join('.cache', 'data'))
+
+# Cache di memori: path absolut -> (fingerprint, DataFrame)
+_data_cache = {}
+_cache_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+def file_fingerprint(filepath, use_content_hash=False):
+    """
+    Membuat fingerprint file dari path, ukuran, dan waktu modifikasi (mtime).
+    Jika use_content_hash=True, isi file ikut di-hash (lebih lambat, tapi tahan
+    terhadap file yang disalin ulang dengan mtime yang sama).
+    """
+    stat = os.stat(filepath)
+    hasher = hashlib.sha256()
+    hasher.update(os.path.abspath(filepath).encode())
+    hasher.update(f"|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    if use_content_hash:
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+    return hasher.hexdigest()[:16]
+
+def _path_key(filepath):
+    """Prefix nama file cache yang unik per path sumber."""
+    return hashlib.sha256(os.path.abspath(filepath).encode()).hexdigest()[:12]
+
+def _read_source(filepath):
+    """Membaca file sumber sesuai ekstensinya (Excel, CSV, atau Parquet)."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.csv':
+        return pd.read_csv(filepath)
+    if ext == '.parquet':
+        return pd.read_parquet(filepath)
+    return pd.read_excel(filepath)
+
+def _disk_cache_path(filepath, fingerprint):
+    return os.path.join(DATA_CACHE_DIR, f"{_path_key(filepath)}-{fingerprint}.parquet")
+
+def _remove_disk_cache(filepath, keep=None):
+    """Menghapus file cache Parquet milik filepath (kecuali path `keep`)."""
+    pattern = os.path.join(DATA_CACHE_DIR, f"{_path_key(filepath)}-*.parquet")
+    for path in glob.glob(pattern):
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def _load_with_cache(filepath, use_content_hash=False):
+    """Memuat data melalui cache memori -> cache Parquet -> file sumber."""
+    abs_path = os.path.abspath(filepath)
+    fingerprint = file_fingerprint(filepath, use_content_hash)
+
+    cached = _data_cache.get(abs_path)
+    if cached is not None and cached[0] == fingerprint:
+        _cache_stats['memory_hits'] += 1
+        return cached[1]
+
+    cache_path = _disk_cache_path(filepath, fingerprint)
+    df = None
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+            _cache_stats['disk_hits'] += 1
+        except Exception:
+            df = None # Cache rusak / engine Parquet tidak tersedia: baca ulang sumber
+
+    if df is None:
+        _cache_stats['misses'] += 1
+        df = _read_source(filepath)
+        try:
+            os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache_path, index=False)
+            _remove_disk_cache(filepath, keep=cache_path) # Buang cache versi file yang lama
+        except Exception:
+            pass # Tanpa pyarrow/fastparquet, cukup gunakan cache memori
+
+    _data_cache[abs_path] = (fingerprint, df)
+    return df
+
+def invalidate_data_cache(filepath=None):
+    """
+    Menghapus cache data (memori dan Parquet) untuk satu file,
+    atau seluruh cache jika filepath=None.
+    """
+    if filepath is None:
+        _data_cache.clear()
+        for path in glob.glob(os.path.join(DATA_CACHE_DIR, '*.parquet')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return
+    _data_cache.pop(os.path.abspath(filepath), None)
+    _remove_disk_cache(filepath)
+
+def get_data_cache_stats():
+    """Mengembalikan jumlah hit (memori/disk) dan miss dari cache data."""
+    stats = dict(_cache_stats)
+    stats['entries'] = len(_data_cache)
+    return stats
+
+def load_data(filepath, use_cache=True, use_content_hash=False):
+    """
+    Memuat dataset dari file Excel (atau CSV/Parquet).
+    Dengan use_cache=True, file hanya di-parse sekali per versi (path, ukuran, mtime);
+    pemuatan berikutnya dilayani dari memori atau cache Parquet.
+    DataFrame yang dikembalikan dipakai bersama oleh cache, jadi jangan diubah in-place.
+    """
     try:
-        df = pd.read_excel(filepath)
+        with stage('load') as handle:
+            df = _load_with_cache(filepath, use_content_hash) if use_cache else _read_source(filepath)
+            handle.rows = len(df)
         return df
     except FileNotFoundError:
-        st.error(f"Error: File '{filepath}' tidak ditemukan. Pastikan file Excel berada di direktori yang sama.")
+        report_error(f"Error: File '{filepath}' tidak ditemukan. Pastikan file Excel berada di direktori yang sama.")
         return None
     except Exception as e:
-        st.error(f"Error saat memuat data dari '{filepath}': {e}")
+        report_error(f"Error saat memuat data dari '{filepath}': {e}")
         return None
 
-def preprocess_data(df):
+# Bentuk teks harga yang dikenali: "Rp" opsional, angka dengan titik ribuan, desimal ",xx" opsional.
+# Format lain ("-100", "Rp 1,5 M") menjadi NaN, bukan angka yang salah.
+_PRICE_SHAPE = re.compile(r'^\s*(?:rp\.?)?\s*[\d.]+(?:,\d*)?\s*$', re.IGNORECASE)
+# Pembersihan teks yang sudah lolos _PRICE_SHAPE: buang bagian desimal lalu semua karakter non-digit
+_PRICE_PATTERN = re.compile(r',\d*\s*$|\D')
+
+@functools.lru_cache(maxsize=1024)
+def clean_column_name(name):
+    """Nama kolom bersih: tanpa spasi di tepi, spasi -> underscore, tanpa tanda kurung, huruf kecil."""
+    return str(name).strip().replace(' ', '_').replace('(', '').replace(')', '').lower()
+
+def clean_column_names(df, copy=False):
+    """Penanganan Nama Kolom pada df (in-place, kecuali copy=True)."""
+    if copy:
+        df = df.copy()
+    df.columns = [clean_column_name(col) for col in df.columns]
+    return df
+
+def parse_price(series):
+    """
+    Mengonversi kolom harga ke float64 dalam satu lintasan string.
+    Menangani teks seperti "Rp 4.700.000" / "rp.4.700.000,00" maupun input yang sudah numerik.
+    Teks dengan format lain menjadi NaN (lalu diisi median / ditandai), dengan satu peringatan.
+    Harga tetap float64 karena float32 tidak bisa menyimpan nilai Rupiah secara persis.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype('float64') # Copy-on-Write: tanpa salinan jika sudah float64
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind in ('integer', 'floating', 'mixed-integer-float', 'decimal', 'empty'):
+        # Kolom object yang isinya angka saja (umum dari Excel/JSON)
+        return pd.to_numeric(series, errors='coerce').astype('float64')
+    if kind == 'string':
+        is_string = series.notna().to_numpy(dtype=bool)
+    else:
+        is_string = series.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+
+    prices = np.full(len(series), np.nan)
+    text = series[is_string].astype(object)
+    valid = text.str.fullmatch(_PRICE_SHAPE).to_numpy(dtype=bool)
+    n_invalid = int((~valid).sum())
+    if n_invalid:
+        report_warning(f"{n_invalid} nilai harga tidak dikenali formatnya dan dianggap kosong.")
+    cleaned = text[valid].str.replace(_PRICE_PATTERN, '', regex=True)
+    string_prices = np.full(len(text), np.nan)
+    string_prices[valid] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    prices[is_string] = string_prices
+
+    non_string = ~is_string & series.notna().to_numpy(dtype=bool)
+    if non_string.any():
+        # Sel yang sudah berupa angka (umum pada Excel dengan tipe campuran)
+        prices[non_string] = pd.to_numeric(series[non_string], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.Series(prices, index=series.index, name=series.name)
+
+def is_categorical_dtype(dtype):
+    """Kolom teks: dtype object, atau dtype string pandas (default untuk teks sejak pandas 3)."""
+    return pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype)
+
+def smallest_int_dtype(low, high):
+    """Tipe integer bertanda terkecil yang memuat rentang [low, high]."""
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def to_model_input(X, columns=None):
+    """
+    Matriks fitur C-contiguous float32 untuk forest. Pohon sklearn bekerja dengan float32,
+    sehingga input dalam bentuk ini tidak dikonversi/disalin lagi di dalam fit dan predict.
+    """
+    if hasattr(X, 'columns'):
+        X = (X[columns] if columns is not None else X).to_numpy(dtype=np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+class DataPreprocessor:
+    """
+    Pra-pemrosesan yang dilatih sekali (fit) lalu diterapkan berulang kali (transform).
+
+    Menyimpan nilai pengisi missing values (median/mode), kosakata kategori untuk
+    Label Encoding, dan statistik StandardScaler, sehingga data baru (form prediksi,
+    batch scoring, retraining) di-encode persis sama dengan data latih tanpa fitting ulang.
+    Objek ini bisa di-pickle.
+
+    DataFrame input tidak pernah diubah maupun disalin: kolom dibaca lewat pemetaan
+    nama bersih -> nama asli, dan fitur ditulis langsung ke satu matriks float.
+
+    compact=True menghasilkan representasi hemat memori: fitur kontinu float32 (diskala),
+    kode kategori dan kolom integer (jumlah kamar, luas, tahun) dalam int8/int16/int32 terkecil
+    yang cukup, tanpa scaling. Pohon keputusan tidak terpengaruh scaling per fitur, sehingga
+    model yang dilatih dari output compact tetap setara.
+    """
+
+    def __init__(self, target='harga', compact=False):
+        self.target = target
+        self.compact = compact
+
+    def _column_map(self, df):
+        """Memetakan nama kolom bersih -> nama kolom asli di df (tanpa menyalin data)."""
+        return {clean_column_name(col): col for col in df.columns}
+
+    def _target_values(self, df, column_map):
+        return parse_price(df[column_map[self.target]])
+
+    def fit(self, df):
+        """Mempelajari nilai pengisi, kosakata kategori, dan statistik scaler dari df."""
+        with stage('clean', rows=len(df)):
+            column_map = self._column_map(df)
+            self.columns_ = list(column_map)
+
+            numeric_cols, categorical_cols = [], []
+            for col, source in column_map.items():
+                if col == self.target:
+                    continue
+                dtype = df[source].dtype
+                if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                    numeric_cols.append(col)
+                elif is_categorical_dtype(dtype):
+                    categorical_cols.append(col)
+        self.numeric_columns_ = numeric_cols
+        self.categorical_columns_ = categorical_cols
+        # Fitur yang diskala: semua kolom numerik setelah encoding, kecuali target
+        self.feature_columns_ = [col for col in self.columns_ if col in numeric_cols or col in categorical_cols]
+
+        # Nilai pengisi: median untuk numerik, mode untuk kategorikal
+        with stage('impute', rows=len(df)):
+            self.fill_values_ = {col: df[column_map[col]].median() for col in numeric_cols}
+            if self.target in column_map:
+                self.fill_values_[self.target] = self._target_values(df, column_map).median()
+            for col in categorical_cols:
+                mode = df[column_map[col]].mode()
+                self.fill_values_[col] = mode.iloc[0] if not mode.empty else None
+
+        # Kosakata kategori (urutan terurut, sama seperti LabelEncoder) beserta frekuensinya
+        with stage('encode', rows=len(df)):
+            self.categories_, self.category_counts_ = {}, {}
+            for col in categorical_cols:
+                values = self._fill(df[column_map[col]], col)
+                self.category_counts_[col] = values.astype(str).value_counts().to_dict()
+                self.categories_[col] = sorted(self.category_counts_[col])
+            self.n_samples_ = len(df)
+            features = self._encode(df, column_map) if self.feature_columns_ else None
+
+        with stage('scale', rows=len(df)):
+            from sklearn.preprocessing import StandardScaler # Impor berat: hanya saat fit
+            scaler = StandardScaler()
+            if features is not None:
+                scaler.fit(features)
+                scaler.feature_names_in_ = np.asarray(self.feature_columns_, dtype=object)
+            self.scaler_ = scaler
+
+        integer_ranges = {}
+        for col in numeric_cols:
+            values = df[column_map[col]]
+            if pd.api.types.is_integer_dtype(values.dtype) and len(values):
+                integer_ranges[col] = (values.min(), values.max())
+        self._set_output_dtypes(integer_ranges)
+
+        from schema import FeatureSchema # Impor lokal: schema.py memakai helper dari modul ini
+        self.schema_ = FeatureSchema.from_dataframe(df, self.target)
+        return self
+
+    def _set_output_dtypes(self, integer_ranges):
+        """Menentukan dtype output mode compact dari rentang kolom integer {kolom: (min, maks)}."""
+        self.output_dtypes_ = {}
+        for col in self.feature_columns_:
+            if col in self.categories_:
+                # Kode -1 (kategori tidak dikenal) s.d. jumlah kategori; sisakan ruang untuk kategori baru
+                self.output_dtypes_[col] = smallest_int_dtype(-1, 2 * len(self.categories_[col]))
+            elif col in integer_ranges:
+                self.output_dtypes_[col] = smallest_int_dtype(*integer_ranges[col])
+            else:
+                self.output_dtypes_[col] = np.dtype(np.float32)
+
+    def _fill(self, values, col):
+        fill_value = self.fill_values_.get(col)
+        if fill_value is not None and values.hasnans:
+            values = values.fillna(fill_value)
+        return values
+
+    def _default_value(self, col):
+        """Nilai fitur (belum diskala) untuk kolom yang tidak ada di input: nilai pengisi hasil fit."""
+        fill_value = self.fill_values_.get(col)
+        if fill_value is None:
+            return np.nan
+        if col in self.categories_:
+            vocabulary = self.categories_[col]
+            return vocabulary.index(str(fill_value)) if str(fill_value) in vocabulary else -1
+        return fill_value
+
+    def _encode(self, df, column_map, dtype=np.float64):
+        """Mengisi missing values dan meng-encode kategori ke satu matriks fitur (belum diskala)."""
+        # Urutan Fortran: tiap kolom fitur contiguous saat diisi, dan DataFrame bisa dibuat tanpa salinan
+        features = np.empty((len(df), len(self.feature_columns_)), dtype=dtype, order='F')
+        for j, col in enumerate(self.feature_columns_):
+            source = column_map.get(col)
+            if source is None:
+                features[:, j] = self._default_value(col) # Kolom tidak ada di input
+                continue
+            values = self._fill(df[source], col)
+            if col in self.categories_:
+                # Lookup vektor ke kosakata hasil fit; kategori yang tidak dikenal menjadi -1
+                if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+                    values = values.astype(str)
+                features[:, j] = pd.Categorical(values, categories=self.categories_[col]).codes
+            else:
+                features[:, j] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        return features
+
+    def _compact_frame(self, features, index):
+        """Output mode compact: kolom integer tanpa scaling dalam dtype kecil, kolom lain float32 diskala."""
+        columns = {}
+        for j, col in enumerate(self.feature_columns_):
+            values = features[:, j]
+            dtype = self.output_dtypes_[col]
+            if dtype.kind == 'i':
+                info = np.iinfo(dtype)
+                # Nilai di luar rentang hasil fit (atau pecahan/NaN) tetap float32 agar tidak terpotong
+                if len(values) and (np.isnan(values).any() or values.min() < info.min or values.max() > info.max
+                                    or not np.array_equal(values, np.round(values))):
+                    columns[col] = values
+                else:
+                    columns[col] = values.astype(dtype)
+            else:
+                values -= np.float32(self.scaler_.mean_[j]) # Scaling in-place pada kolom float32
+                values /= np.float32(self.scaler_.scale_[j])
+                columns[col] = values
+        return pd.DataFrame(columns, index=index)
+
+    def transform(self, df):
+        """Menerapkan pra-pemrosesan hasil fit ke data baru tanpa fitting ulang."""
+        column_map = self._column_map(df)
+        compact = getattr(self, 'compact', False)
+        # Pengisian missing values terjadi per kolom di dalam _encode
+        with stage('encode', rows=len(df)):
+            features = self._encode(df, column_map, dtype=np.float32 if compact else np.float64)
+        with stage('scale', rows=len(df)):
+            if compact:
+                df_processed = self._compact_frame(features, df.index)
+            else:
+                if self.feature_columns_:
+                    features -= self.scaler_.mean_ # Scaling in-place pada matriks fitur
+                    features /= self.scaler_.scale_
+                df_processed = pd.DataFrame(features, columns=self.feature_columns_, index=df.index, copy=False)
+
+        if self.target in column_map:
+            with stage('clean', rows=len(df)):
+                target = self._target_values(df, column_map)
+                target = target.fillna(self.fill_values_.get(self.target, np.nan))
+                df_processed.insert(self.columns_.index(self.target), self.target, target.to_numpy())
+        return df_processed
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+def preprocess_data(df, compact=False):
     """
     Melakukan pra-pemrosesan data: penanganan nama kolom, konversi tipe data,
     penanganan missing values, encoding kategorikal, dan scaling fitur numerik.
     Mengembalikan DataFrame yang sudah diproses dan objek StandardScaler yang sudah dilatih.
+    df tidak diubah, sehingga pemanggil tidak perlu membuat salinan terlebih dahulu.
+    Gunakan DataPreprocessor secara langsung untuk menerapkan ulang pra-pemrosesan ke data baru.
+    compact=True: fitur float32 dan integer kecil (lihat DataPreprocessor).
     """
-    df_processed = df.copy()
-
-    # Penanganan Nama Kolom: Ubah ke lowercase, ganti spasi dengan underscore
-    df_processed.columns = df_processed.columns.str.strip().str.replace(' ', '_').str.replace('(', '').str.replace(')', '').str.lower()
-    # print("  - Nama kolom telah dibersihkan dan diubah ke huruf kecil.") # Di Streamlit ini tidak muncul, hanya untuk debugging
-
-    # Penanganan Kolom 'harga': Konversi ke numerik jika formatnya masih teks
-    if 'harga' in df_processed.columns:
-        df_processed['harga'] = df_processed['harga'].astype(str).str.replace('rp.', '', regex=False).str.replace('.', '', regex=False).astype(float)
-        # print("  - Kolom 'harga' telah dikonversi ke format numerik.")
-    # else:
-        # st.warning("Kolom 'harga' tidak ditemukan. Pastikan nama kolom target Anda benar.")
-
-    # Penanganan Missing Values: Isi numerik dengan median, kategorikal dengan mode
-    for col in df_processed.select_dtypes(include=np.number).columns:
-        if df_processed[col].isnull().sum() > 0:
-            df_processed[col] = df_processed[col].fillna(df_processed[col].median())
-            # st.info(f"Mengisi missing values di kolom numerik '{col}' dengan median.")
-
-    # Mengisi missing values untuk kolom bertipe 'object' (string) dengan mode
-    for col in df_processed.select_dtypes(include='object').columns:
-        if df_processed[col].isnull().sum() > 0:
-            df_processed[col] = df_processed[col].fillna(df_processed[col].mode()[0])
-            # st.info(f"Mengisi missing values di kolom kategorikal '{col}' dengan mode.")
-
-    # >>>>> BAGIAN PERBAIKAN: Encoding Semua Kolom Kategorikal (tipe 'object') <<<<<
-    categorical_cols_to_encode = df_processed.select_dtypes(include='object').columns.tolist()
-
-    # Pastikan kolom target 'harga' tidak ada di daftar ini jika ia masih string
-    if 'harga' in categorical_cols_to_encode:
-        categorical_cols_to_encode.remove('harga')
-
-    if categorical_cols_to_encode:
-        # print("  - Melakukan Label Encoding pada kolom-kolom kategorikal berikut:")
-        for col in categorical_cols_to_encode:
-            le = LabelEncoder()
-            df_processed[col] = le.fit_transform(df_processed[col].astype(str)) # Pastikan semua nilai adalah string
-            # print(f"    - Kolom '{col}'")
-    # else:
-        # print("  - Tidak ditemukan kolom kategorikal (tipe object) untuk di-encode.")
-
-
-    # Scaling Fitur Numerik (Kecuali target 'harga')
-    numeric_features_to_scale = df_processed.select_dtypes(include=np.number).columns.tolist()
-    if 'harga' in numeric_features_to_scale:
-        numeric_features_to_scale.remove('harga') # Jangan scale kolom target
-
-    scaler = StandardScaler() # Inisialisasi scaler
-    if numeric_features_to_scale:
-        df_processed[numeric_features_to_scale] = scaler.fit_transform(df_processed[numeric_features_to_scale])
-        # st.info(f"Melakukan StandardScaler pada fitur: {', '.join(numeric_features_to_scale)}.")
-    # else:
-        # st.warning("Tidak ada fitur numerik yang tersisa untuk diskala setelah mengecualikan 'harga'.")
-
-    return df_processed, scaler # Mengembalikan scaler yang sudah dilatih
\ No newline at end of file
+    preprocessor = DataPreprocessor(compact=compact)
+    df_processed = preprocessor.fit_transform(df)
+    return df_processed, preprocessor.scaler_ # Mengembalikan scaler yang sudah dilatih
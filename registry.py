@@ -0,0 +1,145 @@
+# registry.py
+
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import pandas as pd
+
+# Direktori registry model lokal
+MODEL_REGISTRY_DIR = os.environ.get('TUBES_MODEL_DIR', os.path.join('.cache', 'models'))
+
+def dataframe_fingerprint(df):
+    """Fingerprint isi DataFrame (nama kolom + hash nilai per baris), dihitung secara vektor."""
+    hasher = hashlib.sha256()
+    hasher.update('|'.join(map(str, df.columns)).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return hasher.hexdigest()[:16]
+
+def preprocessor_fingerprint(preprocessor):
+    """Fingerprint state hasil fit preprocessor yang memengaruhi transform (None jika tanpa preprocessor)."""
+    if preprocessor is None:
+        return None
+    scaler = getattr(preprocessor, 'scaler_', None)
+    state = {
+        'target': getattr(preprocessor, 'target', None),
+        'compact': getattr(preprocessor, 'compact', False),
+        'feature_columns': getattr(preprocessor, 'feature_columns_', None),
+        'fill_values': getattr(preprocessor, 'fill_values_', None),
+        'categories': getattr(preprocessor, 'categories_', None),
+        'output_dtypes': {col: str(dtype) for col, dtype in (getattr(preprocessor, 'output_dtypes_', None) or {}).items()},
+        'scaler': None if scaler is None else (scaler.mean_, scaler.scale_),
+    }
+    return joblib.hash(state)[:16]
+
+def model_key(data_fingerprint, params):
+    """Kunci model: hash dari fingerprint data dan hyperparameter pelatihan."""
+    payload = json.dumps({'data': data_fingerprint, 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+class ModelRegistry:
+    """
+    Registry model lokal berbasis joblib.
+
+    Setiap artefak (dict berisi model, preprocessor, daftar kolom fitur, metrik, dll.)
+    disimpan sebagai satu file `<key>.joblib`. Artefak baru dimuat saat pertama kali diminta,
+    lalu disimpan di memori.
+
+    Pilihan kompresi: tanpa kompresi (default) file lebih besar tetapi dimuat paling cepat;
+    compress=3 jauh lebih kecil di disk dengan waktu muat lebih lama. mmap_mode hanya berlaku
+    untuk array NumPy biasa di artefak (mis. hasil evaluasi) pada file tanpa kompresi. Pohon
+    sklearn tidak ikut ter-memory-map: Tree menyalin array node ke memorinya sendiri saat
+    di-unpickle, sehingga seluruh forest tetap dibaca ke RAM.
+    """
+
+    def __init__(self, directory=MODEL_REGISTRY_DIR, compress=0, mmap_mode='r'):
+        self.directory = directory
+        self.compress = compress
+        self.mmap_mode = mmap_mode
+        self._loaded = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.joblib")
+
+    def _index_path(self):
+        return os.path.join(self.directory, 'index.json')
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'latest': None, 'entries': {}}
+
+    def _write_index(self, index):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2, default=str)
+        os.replace(tmp_path, self._index_path())
+
+    def has(self, key):
+        return key in self._loaded or os.path.exists(self._path(key))
+
+    def save(self, key, artifact):
+        """Menyimpan artefak secara atomik dan menandainya sebagai model terbaru."""
+        os.makedirs(self.directory, exist_ok=True)
+        artifact = dict(artifact, key=key, created_at=time.time())
+        if artifact.get('model') is not None:
+            artifact['model'].registry_key_ = key # Versi model, mis. untuk kunci cache prediksi
+        tmp_path = self._path(key) + '.tmp'
+        joblib.dump(artifact, tmp_path, compress=self.compress)
+        os.replace(tmp_path, self._path(key))
+
+        index = self._read_index()
+        index['entries'][key] = {
+            'created_at': artifact['created_at'],
+            'params': artifact.get('params'),
+            'metrics': {name: float(value) for name, value in (artifact.get('metrics') or {}).items()},
+        }
+        index['latest'] = key
+        self._write_index(index)
+        self._loaded[key] = artifact
+        return key
+
+    def load(self, key):
+        """Memuat artefak berdasarkan kunci (dari memori jika sudah pernah dimuat)."""
+        if key not in self._loaded:
+            # Memory-map hanya berlaku untuk file yang tidak dikompresi (dan tidak untuk node pohon sklearn)
+            mmap_mode = self.mmap_mode if not self.compress else None
+            self._loaded[key] = joblib.load(self._path(key), mmap_mode=mmap_mode)
+        return self._loaded[key]
+
+    def latest_key(self):
+        key = self._read_index().get('latest')
+        return key if key and self.has(key) else None
+
+    def load_latest(self):
+        """Memuat artefak terbaru, atau None jika registry masih kosong."""
+        key = self.latest_key()
+        return self.load(key) if key else None
+
+    def entries(self):
+        """Ringkasan semua model di registry (tanpa memuat artefaknya)."""
+        return self._read_index()['entries']
+
+    def remove(self, key):
+        self._loaded.pop(key, None)
+        if os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+        index = self._read_index()
+        index['entries'].pop(key, None)
+        if index.get('latest') == key:
+            index['latest'] = max(index['entries'], key=lambda k: index['entries'][k]['created_at'], default=None)
+        self._write_index(index)
+
+_default_registry = None
+
+def get_model_registry():
+    """Registry bawaan (satu instance per proses)."""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
@@ -0,0 +1,42 @@
+# reporting.py
+"""
+Pelaporan error/peringatan yang bisa diganti (pluggable) untuk modul komputasi inti.
+
+Modul inti (preprocessing, modeling, utilitas) tidak mengimpor streamlit; pesan untuk pengguna
+dikirim ke reporter aktif. Bawaannya logging, sehingga batch job dan worker tidak memuat UI.
+Aplikasi Streamlit memasang modul streamlit sendiri sebagai reporter:
+
+    import streamlit as st
+    set_reporter(st) # objek apa pun dengan method error(pesan) dan warning(pesan)
+"""
+
+import logging
+
+logger = logging.getLogger('tubes')
+
+class LoggingReporter:
+    """Reporter bawaan: meneruskan pesan ke logger 'tubes'."""
+
+    def error(self, message):
+        logger.error(message)
+
+    def warning(self, message):
+        logger.warning(message)
+
+_reporter = LoggingReporter()
+
+def set_reporter(reporter):
+    """Memasang reporter (objek dengan error/warning); None mengembalikan reporter bawaan. Mengembalikan reporter lama."""
+    global _reporter
+    previous = _reporter
+    _reporter = reporter if reporter is not None else LoggingReporter()
+    return previous
+
+def get_reporter():
+    return _reporter
+
+def report_error(message):
+    _reporter.error(message)
+
+def report_warning(message):
+    _reporter.warning(message)
@@ -0,0 +1,173 @@
+# schema.py
+"""
+Skema fitur yang diturunkan dari data latih, untuk memvalidasi batch sebelum diprediksi.
+
+Validasi berjalan per kolom secara vektor (satu lintasan untuk seluruh batch) dan melaporkan
+semua baris bermasalah sekaligus, bukan gagal di baris pertama:
+- kolom wajib yang tidak ada,
+- nilai kosong pada kolom yang tidak pernah kosong di data latih,
+- tipe salah (teks pada kolom numerik, pecahan pada kolom integer),
+- kategori yang tidak dikenal,
+- nilai di luar rentang data latih (diperlebar `range_margin`) -> peringatan, bukan error.
+"""
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import clean_column_name, is_categorical_dtype
+
+ERROR = 'error'
+WARNING = 'peringatan'
+RANGE_MARGIN = 0.25 # Rentang valid = [min, maks] data latih diperlebar 25% dari lebarnya
+MAX_DETAILS_PER_CHECK = 1_000 # Detail baris per (kolom, jenis error); jumlah total tetap dihitung
+
+class SchemaError(ValueError):
+    """Batch tidak lolos validasi skema; atribut `report` berisi ValidationReport."""
+
+    def __init__(self, report):
+        super().__init__(report.message())
+        self.report = report
+
+class ValidationReport:
+    """Hasil validasi satu batch: mask baris valid, detail error per baris, dan ringkasan per kolom."""
+
+    def __init__(self, n_rows, valid_mask, issues, missing_columns):
+        self.n_rows = n_rows
+        self.valid_mask = valid_mask
+        self.missing_columns = missing_columns
+        self._issues = issues
+
+    @property
+    def is_valid(self):
+        return bool(self.valid_mask.all())
+
+    @property
+    def n_invalid(self):
+        return int(self.n_rows - self.valid_mask.sum())
+
+    @property
+    def errors(self):
+        """DataFrame detail: baris (label index), kolom, kode, tingkat, nilai, pesan."""
+        frames = [issue['details'] for issue in self._issues if len(issue['details'])]
+        if not frames:
+            return pd.DataFrame(columns=['baris', 'kolom', 'kode', 'tingkat', 'nilai', 'pesan'])
+        return pd.concat(frames, ignore_index=True)
+
+    def summary(self):
+        """Jumlah baris bermasalah per (kolom, kode, tingkat)."""
+        return pd.DataFrame(
+            [{'kolom': i['kolom'], 'kode': i['kode'], 'tingkat': i['tingkat'], 'jumlah': i['count']} for i in self._issues],
+            columns=['kolom', 'kode', 'tingkat', 'jumlah'],
+        )
+
+    def message(self):
+        if self.is_valid:
+            return "Semua baris valid."
+        problems = [f"{i['kolom']}: {i['kode']} ({i['count']} baris)" for i in self._issues if i['tingkat'] == ERROR]
+        return f"{self.n_invalid} dari {self.n_rows} baris tidak valid: " + '; '.join(problems)
+
+    def raise_if_invalid(self):
+        if not self.is_valid:
+            raise SchemaError(self)
+        return self
+
+class FeatureSchema:
+    """
+    Spesifikasi kolom input (nama bersih): jenis (numerik/kategorikal), integer, boleh kosong,
+    rentang, dan kategori yang diizinkan. Bisa di-pickle bersama preprocessor/artefak model.
+    """
+
+    def __init__(self, columns, target='harga', range_margin=RANGE_MARGIN):
+        self.columns = columns
+        self.target = target
+        self.range_margin = range_margin
+
+    @classmethod
+    def from_dataframe(cls, df, target='harga', range_margin=RANGE_MARGIN):
+        """Menurunkan skema dari DataFrame latih mentah (nama kolom asli atau sudah dibersihkan)."""
+        columns = {}
+        for source in df.columns:
+            col = clean_column_name(source)
+            if col == target:
+                continue
+            values = df[source]
+            if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+                finite = values.dropna()
+                integer = pd.api.types.is_integer_dtype(values.dtype) or bool(
+                    len(finite) and np.array_equal(finite.to_numpy(), np.round(finite.to_numpy())))
+                columns[col] = {
+                    'kind': 'numeric', 'integer': integer, 'nullable': bool(values.hasnans),
+                    'min': float(finite.min()) if len(finite) else None,
+                    'max': float(finite.max()) if len(finite) else None,
+                }
+            elif is_categorical_dtype(values.dtype):
+                columns[col] = {
+                    'kind': 'categorical', 'nullable': bool(values.hasnans),
+                    'categories': sorted(values.dropna().astype(str).unique().tolist()),
+                }
+        return cls(columns, target, range_margin)
+
+    def _bounds(self, spec):
+        if spec.get('min') is None:
+            return -np.inf, np.inf
+        margin = (spec['max'] - spec['min']) * self.range_margin
+        return spec['min'] - margin, spec['max'] + margin
+
+    def validate(self, df, max_details=MAX_DETAILS_PER_CHECK):
+        """Memvalidasi seluruh batch sekaligus; mengembalikan ValidationReport (tidak melempar error)."""
+        column_map = {clean_column_name(col): col for col in df.columns}
+        n_rows = len(df)
+        invalid = np.zeros(n_rows, dtype=bool)
+        issues = []
+
+        def add(col, code, level, mask, values, message):
+            count = int(mask.sum())
+            if not count:
+                return
+            if level == ERROR:
+                np.logical_or(invalid, mask, out=invalid)
+            positions = np.flatnonzero(mask)[:max_details]
+            details = pd.DataFrame({
+                'baris': df.index[positions],
+                'kolom': col,
+                'kode': code,
+                'tingkat': level,
+                'nilai': np.asarray(values, dtype=object)[positions] if values is not None else None,
+                'pesan': message,
+            })
+            issues.append({'kolom': col, 'kode': code, 'tingkat': level, 'count': count, 'details': details})
+
+        missing_columns = [col for col in self.columns if col not in column_map]
+        for col in missing_columns:
+            add(col, 'kolom_hilang', ERROR, np.ones(n_rows, dtype=bool), None, f"Kolom '{col}' tidak ada di input.")
+
+        for col, spec in self.columns.items():
+            if col not in column_map:
+                continue
+            raw = df[column_map[col]]
+            is_null = raw.isna().to_numpy()
+            if not spec['nullable']:
+                add(col, 'kosong', ERROR, is_null, raw, "Nilai kosong, padahal kolom ini selalu terisi di data latih.")
+
+            if spec['kind'] == 'numeric':
+                numbers = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                not_number = np.isnan(numbers) & ~is_null
+                add(col, 'bukan_angka', ERROR, not_number, raw, "Nilai bukan angka.")
+                present = ~np.isnan(numbers)
+                if spec.get('integer'):
+                    fractional = present & (numbers != np.round(numbers))
+                    add(col, 'bukan_bilangan_bulat', ERROR, fractional, raw, "Kolom ini berisi bilangan bulat.")
+                low, high = self._bounds(spec)
+                with np.errstate(invalid='ignore'):
+                    out_of_range = present & ((numbers < low) | (numbers > high))
+                add(col, 'di_luar_rentang', WARNING, out_of_range, raw,
+                    f"Di luar rentang data latih ({spec['min']:g} s.d. {spec['max']:g})." if spec.get('min') is not None else "Di luar rentang.")
+            else:
+                # Lookup vektor ke kategori yang diizinkan: kode -1 = tidak dikenal
+                text = raw.astype(str).where(~raw.isna())
+                codes = pd.Index(spec['categories']).get_indexer(text)
+                unknown = (codes == -1) & ~is_null
+                add(col, 'kategori_tidak_dikenal', ERROR, unknown, raw,
+                    f"Kategori tidak dikenal; pilihan: {', '.join(spec['categories'])}.")
+
+        return ValidationReport(n_rows, ~invalid, issues, missing_columns)
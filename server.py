@@ -0,0 +1,253 @@
+# server.py
+"""
+Server HTTP lokal untuk prediksi harga dengan micro-batching.
+
+Model & preprocessor dimuat sekali dari registry. Permintaan yang datang bersamaan
+dikumpulkan dalam jendela waktu kecil lalu diprediksi dengan satu panggilan model.predict.
+
+    python server.py --port 8502 --window-ms 5 --max-batch 256 --cache-size 10000 --cache-ttl 3600
+
+Endpoint:
+    POST /predict   body: satu record JSON atau list record (field sama dengan form di app.py)
+    GET  /metrics   latensi p50/p99, kedalaman antrean, jumlah batch, hit-rate cache prediksi
+    GET  /health
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from fast_forest import compile_forest
+from prediction_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL, PREDICTION_CACHE_DB, PredictionCache, model_version
+from registry import MODEL_REGISTRY_DIR, ModelRegistry
+
+class MicroBatcher:
+    """
+    Menggabungkan permintaan prediksi dari banyak thread menjadi satu batch.
+
+    Sebuah worker thread menunggu permintaan pertama, lalu menampung permintaan lain
+    selama `window_ms` (atau sampai `max_batch` record) sebelum memanggil predict_fn
+    sekali untuk seluruh batch. Setiap pemanggil menerima Future berisi prediksinya.
+    """
+
+    def __init__(self, predict_fn, window_ms=5.0, max_batch=256, latency_window=10_000):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._batch_sizes = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """Mengantrekan list record; mengembalikan Future berisi array prediksi."""
+        future = Future()
+        self._queue.put((records, future, time.perf_counter()))
+        return future
+
+    def predict(self, records, timeout=30):
+        return self.submit(records).result(timeout)
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        items, n_records = [first], len(first[0])
+        deadline = time.perf_counter() + self.window
+        while n_records < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stopped = True
+                break
+            items.append(item)
+            n_records += len(item[0])
+        return items
+
+    def _run(self):
+        while not self._stopped:
+            items = self._collect()
+            if items is None:
+                break
+            records = [record for item in items for record in item[0]]
+            try:
+                predictions = np.asarray(self.predict_fn(records))
+            except Exception as e:
+                for _, future, _ in items:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            offset = 0
+            with self._lock:
+                self._batch_sizes.append(len(records))
+                for item_records, future, enqueued in items:
+                    future.set_result(predictions[offset:offset + len(item_records)])
+                    offset += len(item_records)
+                    self._latencies.append(done - enqueued)
+
+    def metrics(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            batch_sizes = np.array(self._batch_sizes)
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (float('nan'), float('nan'))
+        return {
+            'requests': len(latencies),
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'queue_depth': self._queue.qsize(),
+            'batches': len(batch_sizes),
+            'mean_batch_size': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+def make_predict_fn(artifact, cache=None):
+    """
+    Fungsi prediksi untuk list record JSON: transform dengan preprocessor tersimpan lalu predict.
+    Dengan `cache` (PredictionCache), hanya record yang belum pernah diprediksi yang masuk model.
+    """
+    preprocessor = artifact['preprocessor']
+    feature_columns = artifact['feature_columns']
+    model = artifact['model']
+    version = model_version(model)
+    if hasattr(model, 'set_params'):
+        # Micro-batch kecil: thread pool joblib hanya menambah biaya dispatch (juga untuk sub-model router)
+        try:
+            model.set_params(n_jobs=1)
+        except ValueError: # Model tanpa parameter n_jobs
+            pass
+    if hasattr(model, 'estimators_'):
+        model = compile_forest(model) # Micro-batch kecil: traversal vektor tanpa dispatch thread pool
+
+    def predict_raw(raw):
+        return model.predict(preprocessor.transform(raw)[feature_columns])
+
+    def predict_records(records):
+        raw = pd.DataFrame.from_records(records)
+        if cache is None:
+            return predict_raw(raw)
+        return cache.predict(raw, version, predict_raw)
+
+    return predict_records
+
+def _make_handler(batcher, schema=None, cache=None):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                metrics = batcher.metrics()
+                if cache is not None:
+                    metrics['cache'] = cache.stats()
+                self._send_json(200, metrics)
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError as e:
+                self._send_json(400, {'error': f'JSON tidak valid: {e}'})
+                return
+            records = payload if isinstance(payload, list) else [payload]
+            if schema is not None:
+                # Validasi seluruh record permintaan sekaligus, sebelum masuk micro-batch bersama
+                report = schema.validate(pd.DataFrame.from_records(records))
+                if not report.is_valid:
+                    errors = report.errors.astype({'nilai': str}).to_dict('records')
+                    self._send_json(422, {'error': report.message(), 'rows': errors})
+                    return
+            try:
+                predictions = batcher.predict(records)
+            except Exception as e:
+                self._send_json(422, {'error': str(e)})
+                return
+            self._send_json(200, {'predictions': predictions.tolist()})
+
+        def log_message(self, format, *args):
+            pass # Jangan tulis log akses per permintaan
+
+    return PredictionHandler
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # Backlog besar agar lonjakan koneksi bersamaan tidak ditolak
+
+def create_server(artifact, host='127.0.0.1', port=8502, window_ms=5.0, max_batch=256, cache=None):
+    """Membuat server HTTP (belum dijalankan) beserta MicroBatcher-nya; `cache` opsional (PredictionCache)."""
+    batcher = MicroBatcher(make_predict_fn(artifact, cache), window_ms=window_ms, max_batch=max_batch)
+    schema = getattr(artifact['preprocessor'], 'schema_', None)
+    server = PredictionServer((host, port), _make_handler(batcher, schema, cache))
+    server.batcher = batcher
+    server.cache = cache
+    return server
+
+def predict_remote(records, url='http://127.0.0.1:8502', timeout=30):
+    """Klien lokal sederhana: mengirim record ke server dan mengembalikan list prediksi."""
+    request = urllib.request.Request(
+        f"{url}/predict", data=json.dumps(records).encode(),
+        headers={'Content-Type': 'application/json'}, method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())['predictions']
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server HTTP prediksi harga rumah dengan micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--registry-dir', default=MODEL_REGISTRY_DIR)
+    parser.add_argument('--model-key', default=None, help="Kunci model di registry (default: model terbaru)")
+    parser.add_argument('--window-ms', type=float, default=5.0, help="Jendela pengumpulan micro-batch (ms)")
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_ENTRIES, help="Jumlah entri cache prediksi (0 = tanpa cache)")
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL, help="Umur entri cache prediksi (detik)")
+    parser.add_argument('--cache-db', default=PREDICTION_CACHE_DB, help="File SQLite untuk cache bersama antar proses (opsional)")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.registry_dir)
+    key = args.model_key or registry.latest_key()
+    if key is None:
+        raise SystemExit(f"Registry model di '{args.registry_dir}' masih kosong. Latih model terlebih dahulu.")
+    cache = PredictionCache(args.cache_size, args.cache_ttl, args.cache_db) if args.cache_size > 0 else None
+    server = create_server(registry.load(key), args.host, args.port, args.window_ms, args.max_batch, cache)
+    print(f"Melayani model {key} di http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.batcher.close()
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+# streaming.py
+
+import os
+from collections import Counter
+
+import pandas as pd
+import numpy as np
+
+from preprocessing import DataPreprocessor, clean_column_name, is_categorical_dtype, parse_price
+from schema import FeatureSchema
+
+DEFAULT_CHUNKSIZE = 100_000
+
+def iter_chunks(filepath, chunksize=DEFAULT_CHUNKSIZE, columns=None):
+    """Membaca file CSV atau Parquet per potongan (chunk) berisi maksimal `chunksize` baris."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.csv':
+        yield from pd.read_csv(filepath, chunksize=chunksize, usecols=columns)
+    elif ext == '.parquet':
+        import pyarrow.parquet as pq # Hanya dibutuhkan untuk input Parquet
+        parquet_file = pq.ParquetFile(filepath)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Mode chunked hanya mendukung file CSV atau Parquet, bukan '{ext}'.")
+
+def count_rows(filepath, chunksize=DEFAULT_CHUNKSIZE):
+    """Jumlah baris data di file CSV (satu lintasan ringan, satu kolom) atau Parquet (dari metadata)."""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(filepath).metadata.num_rows
+    if ext != '.csv':
+        raise ValueError(f"Mode chunked hanya mendukung file CSV atau Parquet, bukan '{ext}'.")
+    return sum(len(chunk) for chunk in pd.read_csv(filepath, chunksize=chunksize, usecols=[0]))
+
+class RunningMoments:
+    """
+    Rata-rata dan varians yang diperbarui per batch (algoritma paralel Chan et al.).
+    Nilai NaN diabaikan; jumlah nilai kosong dicatat terpisah.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.n_missing = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        self.n_missing += int(missing.sum())
+        values = values[~missing]
+        if len(values):
+            self.merge_stats(len(values), values.mean(), ((values - values.mean()) ** 2).sum())
+        return self
+
+    def merge_stats(self, n, mean, m2):
+        """Menggabungkan statistik (n, mean, M2) sekelompok nilai ke akumulator."""
+        if n == 0:
+            return self
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        return self
+
+    @property
+    def var(self):
+        return self.m2 / self.n if self.n else 0.0
+
+class QuantileSketch:
+    """
+    Sketch kuantil aproksimatif bergaya KLL dengan memori terbatas.
+
+    Setiap level menyimpan paling banyak `k` nilai; level yang penuh diurutkan lalu
+    separuh nilainya (offset acak) dinaikkan ke level berikutnya dengan bobot dua kali lipat.
+    Memori O(k log(n/k)), dan dua sketch bisa digabung dengan merge().
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level >= len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Jumlah ganjil: satu nilai tetap tinggal di level ini
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, qs):
+        """Mengembalikan estimasi kuantil untuk tiap q di `qs` (0..1)."""
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side='left')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+def _scaler_from_stats(columns, means, variances, n_samples):
+    """Membuat StandardScaler yang sudah 'terlatih' dari statistik hasil streaming."""
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    scaler.mean_ = np.asarray(means, dtype=np.float64)
+    scaler.var_ = np.asarray(variances, dtype=np.float64)
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0) # Varians nol -> skala 1, seperti sklearn
+    scaler.n_samples_seen_ = n_samples
+    scaler.n_features_in_ = len(columns)
+    scaler.feature_names_in_ = np.asarray(columns, dtype=object)
+    return scaler
+
+def fit_preprocessor_chunked(filepath, chunksize=DEFAULT_CHUNKSIZE, target='harga', sketch_size=200, compact=False):
+    """
+    Lintasan pertama mode chunked: membangun DataPreprocessor dari file CSV/Parquet
+    tanpa memuat seluruh data ke memori.
+
+    - Statistik scaler dihitung dengan rata-rata/varians streaming.
+    - Median (pengisi missing values numerik) diestimasi dengan QuantileSketch.
+    - Mode dan kosakata kategori dihitung dari peta frekuensi (Counter).
+    Hasilnya setara dengan DataPreprocessor().fit(df), kecuali median yang bersifat aproksimatif.
+    """
+    preprocessor = DataPreprocessor(target=target, compact=compact)
+    column_map = None
+    moments, sketches, counts, missing = {}, {}, {}, {}
+    integer_ranges = {} # Rentang kolom yang bertipe integer di semua chunk (untuk dtype mode compact)
+    value_ranges = {} # Rentang semua kolom numerik (untuk skema validasi)
+    fractional = set() # Kolom numerik yang berisi nilai pecahan
+    n_rows = 0
+
+    for chunk in iter_chunks(filepath, chunksize):
+        if column_map is None:
+            # Jenis kolom ditentukan dari chunk pertama
+            column_map = {clean_column_name(col): col for col in chunk.columns}
+            preprocessor.columns_ = list(column_map)
+            preprocessor.numeric_columns_ = [
+                col for col, source in column_map.items()
+                if col != target and pd.api.types.is_numeric_dtype(chunk[source]) and not pd.api.types.is_bool_dtype(chunk[source])
+            ]
+            preprocessor.categorical_columns_ = [
+                col for col, source in column_map.items()
+                if col != target and is_categorical_dtype(chunk[source].dtype)
+            ]
+            for col in preprocessor.numeric_columns_:
+                moments[col] = RunningMoments()
+                sketches[col] = QuantileSketch(sketch_size)
+                if pd.api.types.is_integer_dtype(chunk[column_map[col]].dtype):
+                    integer_ranges[col] = (np.inf, -np.inf)
+            if target in column_map:
+                sketches[target] = QuantileSketch(sketch_size)
+            for col in preprocessor.categorical_columns_:
+                counts[col] = Counter()
+                missing[col] = 0
+
+        n_rows += len(chunk)
+        for col in preprocessor.numeric_columns_:
+            source = chunk[column_map[col]]
+            values = pd.to_numeric(source, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            moments[col].update(values)
+            sketches[col].update(values)
+            finite = values[~np.isnan(values)]
+            if len(finite):
+                low, high = value_ranges.get(col, (np.inf, -np.inf))
+                value_ranges[col] = (min(low, finite.min()), max(high, finite.max()))
+                if not np.array_equal(finite, np.round(finite)):
+                    fractional.add(col)
+            if col in integer_ranges:
+                if pd.api.types.is_integer_dtype(source.dtype):
+                    low, high = integer_ranges[col]
+                    integer_ranges[col] = (min(low, source.min()), max(high, source.max()))
+                else:
+                    del integer_ranges[col] # Ada chunk dengan nilai kosong/pecahan: bukan kolom integer
+        if target in column_map:
+            sketches[target].update(parse_price(chunk[column_map[target]]).to_numpy())
+        for col in preprocessor.categorical_columns_:
+            values = chunk[column_map[col]]
+            missing[col] += int(values.isna().sum())
+            counts[col].update(values.dropna().astype(str).value_counts().to_dict())
+
+    if column_map is None:
+        raise ValueError(f"File '{filepath}' tidak berisi data.")
+
+    preprocessor.feature_columns_ = [
+        col for col in preprocessor.columns_
+        if col in preprocessor.numeric_columns_ or col in preprocessor.categorical_columns_
+    ]
+    preprocessor.fill_values_ = {col: sketch.quantile(0.5) for col, sketch in sketches.items()}
+    preprocessor.categories_, preprocessor.category_counts_ = {}, {}
+    preprocessor.n_samples_ = n_rows
+
+    means, variances = {}, {}
+    for col in preprocessor.numeric_columns_:
+        # Nilai kosong akan diisi median: gabungkan sebagai kelompok bervarians nol
+        stats = moments[col]
+        stats.merge_stats(stats.n_missing, preprocessor.fill_values_[col], 0.0)
+        means[col], variances[col] = stats.mean, stats.var
+    for col in preprocessor.categorical_columns_:
+        col_counts = counts[col]
+        # Mode: frekuensi tertinggi, nilai terkecil bila seri (seperti pandas.Series.mode)
+        mode = min(col_counts, key=lambda value: (-col_counts[value], value)) if col_counts else None
+        preprocessor.fill_values_[col] = mode
+        if mode is not None:
+            col_counts[mode] += missing[col]
+        vocabulary = sorted(col_counts)
+        preprocessor.categories_[col] = vocabulary
+        preprocessor.category_counts_[col] = dict(col_counts)
+        # Statistik scaler untuk kode Label Encoding dihitung langsung dari frekuensi
+        codes = np.arange(len(vocabulary), dtype=np.float64)
+        freq = np.array([col_counts[value] for value in vocabulary], dtype=np.float64)
+        total = freq.sum()
+        means[col] = (codes * freq).sum() / total if total else 0.0
+        variances[col] = (freq * (codes - means[col]) ** 2).sum() / total if total else 0.0
+
+    preprocessor.scaler_ = _scaler_from_stats(
+        preprocessor.feature_columns_,
+        [means[col] for col in preprocessor.feature_columns_],
+        [variances[col] for col in preprocessor.feature_columns_],
+        n_rows,
+    )
+    preprocessor._set_output_dtypes(integer_ranges)
+
+    schema_columns = {}
+    for col in preprocessor.feature_columns_:
+        if col in preprocessor.categories_:
+            schema_columns[col] = {'kind': 'categorical', 'nullable': missing[col] > 0,
+                                   'categories': list(preprocessor.categories_[col])}
+        else:
+            low, high = value_ranges.get(col, (None, None))
+            schema_columns[col] = {'kind': 'numeric', 'integer': col not in fractional, 'nullable': moments[col].n_missing > 0,
+                                   'min': float(low) if low is not None else None, 'max': float(high) if high is not None else None}
+    preprocessor.schema_ = FeatureSchema(schema_columns, target)
+    return preprocessor
+
+def transform_chunks(filepath, preprocessor, chunksize=DEFAULT_CHUNKSIZE):
+    """Lintasan kedua mode chunked: generator yang menghasilkan chunk yang sudah diproses."""
+    for chunk in iter_chunks(filepath, chunksize):
+        yield preprocessor.transform(chunk)
+
+def preprocess_data_chunked(filepath, chunksize=DEFAULT_CHUNKSIZE, target='harga'):
+    """
+    Pra-pemrosesan dua lintasan dengan memori terbatas untuk file CSV/Parquet besar.
+    Mengembalikan preprocessor yang sudah di-fit dan generator chunk hasil transformasi.
+    """
+    preprocessor = fit_preprocessor_chunked(filepath, chunksize, target=target)
+    return preprocessor, transform_chunks(filepath, preprocessor, chunksize)
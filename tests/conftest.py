@@ -0,0 +1,31 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# Modul proyek berada di root repo (tanpa paket)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import generate_listings
+from preprocessing import DataPreprocessor, to_model_input
+
+@pytest.fixture(scope='session')
+def listings():
+    """Listing mentah sintetis dengan skema data/data_baru.csv."""
+    return generate_listings(1_500, seed=1)
+
+@pytest.fixture(scope='session')
+def fitted(listings):
+    """(preprocessor, df hasil pra-pemrosesan) dari listing sintetis."""
+    preprocessor = DataPreprocessor().fit(listings)
+    return preprocessor, preprocessor.transform(listings)
+
+@pytest.fixture
+def forest(fitted):
+    """RandomForestRegressor kecil yang dilatih seperti train_regression_model (matriks float32)."""
+    from sklearn.ensemble import RandomForestRegressor
+    preprocessor, processed = fitted
+    model = RandomForestRegressor(n_estimators=20, random_state=0, n_jobs=1)
+    model.fit(to_model_input(processed[preprocessor.feature_columns_]), processed['harga'].to_numpy())
+    return model
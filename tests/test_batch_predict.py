@@ -0,0 +1,34 @@
+# tests/test_batch_predict.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_predict import PREDICTION_COLUMN, predict_dataframe, predict_file
+
+@pytest.fixture
+def artifact(fitted, forest):
+    preprocessor, _ = fitted
+    return {'model': forest, 'preprocessor': preprocessor, 'feature_columns': preprocessor.feature_columns_}
+
+@pytest.fixture
+def listings_path(tmp_path, listings):
+    df = listings.drop(columns='HARGA').head(700).copy()
+    df['Kondisi'] = df['Kondisi'].astype(object)
+    df.loc[[3, 400], 'Kondisi'] = 'Tidak Dikenal' # Dua baris tidak lolos skema
+    path = tmp_path / 'listings.csv'
+    df.to_csv(path, index=False)
+    return str(path), df
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_predict_file_matches_in_memory_prediction(tmp_path, artifact, listings_path, n_jobs):
+    input_path, df = listings_path
+    output_path, errors_path = str(tmp_path / 'out.csv'), str(tmp_path / 'errors.csv')
+    stats = predict_file(input_path, output_path, artifact=artifact, batch_size=150, n_jobs=n_jobs, errors_path=errors_path)
+
+    result = pd.read_csv(output_path)
+    assert stats['rows'] == len(result) == len(df)
+    assert stats['invalid_rows'] == 2
+    expected = predict_dataframe(df, artifact)
+    np.testing.assert_allclose(result[PREDICTION_COLUMN], expected, rtol=1e-9)
+    assert np.isnan(result[PREDICTION_COLUMN].iloc[[3, 400]]).all()
+    assert sorted(pd.read_csv(errors_path)['baris']) == [3, 400]
@@ -0,0 +1,30 @@
+# tests/test_fast_forest.py
+import numpy as np
+
+from fast_forest import FlatForest, compile_forest, invalidate_compiled
+from preprocessing import to_model_input
+
+def test_flat_forest_matches_sklearn(fitted, forest):
+    preprocessor, processed = fitted
+    X = to_model_input(processed[preprocessor.feature_columns_])
+    flat = FlatForest.from_sklearn(forest)
+    assert flat.n_estimators == len(forest.estimators_)
+    np.testing.assert_allclose(flat.predict(X), forest.predict(X), rtol=1e-9)
+    np.testing.assert_array_equal(flat.apply(X[:5]) - flat.roots, forest.apply(X[:5]))
+
+def test_flat_tree_matches_sklearn_with_feature_names(fitted):
+    from sklearn.tree import DecisionTreeRegressor
+    preprocessor, processed = fitted
+    X = processed[preprocessor.feature_columns_]
+    tree = DecisionTreeRegressor(max_depth=8, random_state=0).fit(X, processed['harga'])
+    flat = FlatForest.from_sklearn(tree)
+    np.testing.assert_allclose(flat.predict(X[X.columns[::-1]]), tree.predict(X), rtol=1e-9)
+
+def test_compile_forest_cache_follows_estimators(forest):
+    flat = compile_forest(forest)
+    assert compile_forest(forest) is flat
+    forest.estimators_ = forest.estimators_[:5]
+    pruned = compile_forest(forest)
+    assert pruned.n_estimators == 5
+    invalidate_compiled(forest)
+    assert compile_forest(forest) is not pruned
@@ -0,0 +1,23 @@
+# tests/test_incremental.py
+import numpy as np
+import pytest
+
+from benchmark import generate_listings
+from incremental import update_regression_model
+from modeling import make_regression_prediction
+
+@pytest.mark.parametrize('inplace', [False, True])
+@pytest.mark.parametrize('max_trees', [None, 25])
+def test_flat_prediction_matches_sklearn_after_update(fitted, forest, inplace, max_trees):
+    preprocessor, processed = fitted
+    X = processed[preprocessor.feature_columns_].iloc[:50]
+    make_regression_prediction(forest, X, engine='flat') # Isi cache kompilasi dengan forest lama
+
+    model, new_preprocessor, _ = update_regression_model(
+        forest, preprocessor, generate_listings(300, seed=2), n_new_trees=10, max_trees=max_trees, inplace=inplace,
+    )
+    X = new_preprocessor.transform(generate_listings(50, seed=3))[new_preprocessor.feature_columns_]
+    flat = make_regression_prediction(model, X, engine='flat')
+    sklearn = make_regression_prediction(model, X, engine='sklearn')
+    assert len(model.estimators_) == (max_trees or 30)
+    np.testing.assert_allclose(flat, sklearn, rtol=1e-9)
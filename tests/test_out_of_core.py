@@ -0,0 +1,55 @@
+# tests/test_out_of_core.py
+import numpy as np
+import pytest
+
+import out_of_core
+from benchmark import write_listings
+from out_of_core import open_feature_store, train_regression_model_memmap, write_feature_store
+from preprocessing import DataPreprocessor, load_data, to_model_input
+from registry import ModelRegistry
+
+@pytest.fixture
+def listings_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(out_of_core, 'FEATURE_STORE_DIR', str(tmp_path / 'features'))
+    return write_listings(str(tmp_path / 'listings.csv'), 1_001, seed=4)
+
+def _sorted_rows(X):
+    X = np.asarray(X)
+    return X[np.lexsort(X.T[::-1])]
+
+def test_store_holds_every_transformed_row(listings_csv):
+    df = load_data(listings_csv, use_cache=False)
+    preprocessor = DataPreprocessor().fit(df.iloc[:500]) # Di-fit pada sampel, bukan seluruh file
+    meta = write_feature_store(listings_csv, preprocessor=preprocessor, chunksize=128)
+    X_train, X_test, y_train, y_test, _ = open_feature_store(meta['directory'])
+    assert len(X_train) + len(X_test) == len(df) == meta['n_rows']
+    assert len(X_train) == meta['n_train']
+
+    processed = preprocessor.transform(df)
+    expected = to_model_input(processed, meta['feature_columns'])
+    np.testing.assert_array_equal(_sorted_rows(np.vstack([X_train, X_test])), _sorted_rows(expected))
+    np.testing.assert_array_equal(np.sort(np.concatenate([y_train, y_test])), np.sort(processed['harga'].to_numpy()))
+
+def test_memmap_model_matches_in_memory_model(listings_csv):
+    from sklearn.ensemble import RandomForestRegressor
+
+    meta = write_feature_store(listings_csv, chunksize=200)
+    model, X_test, y_test, y_pred, _ = train_regression_model_memmap(meta['directory'], n_estimators=10, n_jobs=1)
+    X_train, _, y_train, _, _ = open_feature_store(meta['directory'])
+    in_memory = RandomForestRegressor(n_estimators=10, random_state=42, n_jobs=1)
+    in_memory.fit(np.array(X_train), np.array(y_train))
+    np.testing.assert_array_equal(y_pred, in_memory.predict(np.array(X_test)))
+
+def test_store_and_registry_keys_depend_on_preprocessor(listings_csv, tmp_path):
+    df = load_data(listings_csv, use_cache=False)
+    plain, compact = DataPreprocessor().fit(df), DataPreprocessor(compact=True).fit(df)
+    meta_plain = write_feature_store(listings_csv, preprocessor=plain)
+    meta_compact = write_feature_store(listings_csv, preprocessor=compact)
+    assert meta_plain['directory'] != meta_compact['directory']
+
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    train_regression_model_memmap(meta_plain['directory'], n_estimators=5, n_jobs=1, registry=registry, preprocessor=plain)
+    train_regression_model_memmap(meta_compact['directory'], n_estimators=5, n_jobs=1, registry=registry, preprocessor=compact)
+    assert len(registry.entries()) == 2
+    with pytest.raises(ValueError):
+        train_regression_model_memmap(meta_plain['directory'], n_estimators=5, registry=registry, preprocessor=compact)
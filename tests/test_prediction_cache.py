@@ -0,0 +1,91 @@
+# tests/test_prediction_cache.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import prediction_cache
+from prediction_cache import PredictionCache, feature_keys, model_version, reset_model_version
+
+class CountingPredictor:
+    """Fungsi prediksi palsu yang mencatat jumlah baris per panggilan."""
+
+    def __init__(self, offset=0.0):
+        self.calls = []
+        self.offset = offset
+
+    def __call__(self, raw):
+        self.calls.append(len(raw))
+        return raw['x'].to_numpy(dtype=float) * 10 + self.offset
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(prediction_cache.time, 'time', lambda: now[0])
+    return now
+
+def test_feature_keys_are_canonical():
+    a = pd.DataFrame({'JKT': [3], 'Luas Tanah M2': [100], 'Kondisi': [' Bagus']})
+    b = pd.DataFrame({'luas_tanah_m2': [100.0], 'kondisi': ['Bagus'], 'jkt': [3.0]})
+    assert feature_keys(a) == feature_keys(b)
+    assert feature_keys(a) != feature_keys(b.assign(jkt=4.0))
+
+def test_hits_misses_and_batch_dedup():
+    cache, predictor = PredictionCache(), CountingPredictor()
+    batch = pd.DataFrame({'x': [1, 2, 1, 3]})
+    np.testing.assert_array_equal(cache.predict(batch, 'v1', predictor), [10, 20, 10, 30])
+    assert predictor.calls == [3] # Duplikat dalam batch diprediksi sekali
+    np.testing.assert_array_equal(cache.predict(batch, 'v1', predictor), [10, 20, 10, 30])
+    assert predictor.calls == [3]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (4, 4, 0.5) # Statistik per baris
+
+def test_lru_eviction():
+    cache, predictor = PredictionCache(max_entries=2), CountingPredictor()
+    for x in (1, 2, 1, 3): # 1 dipakai ulang sebelum 3 masuk -> 2 yang dibuang
+        cache.predict(pd.DataFrame({'x': [x]}), 'v', predictor)
+    cache.predict(pd.DataFrame({'x': [1]}), 'v', predictor)
+    assert predictor.calls == [1, 1, 1]
+    cache.predict(pd.DataFrame({'x': [2]}), 'v', predictor)
+    assert predictor.calls == [1, 1, 1, 1]
+    assert cache.stats()['evictions'] == 2
+
+def test_ttl_expiry(clock):
+    cache, predictor = PredictionCache(ttl=60), CountingPredictor()
+    batch = pd.DataFrame({'x': [1]})
+    cache.predict(batch, 'v', predictor)
+    clock[0] += 59
+    cache.predict(batch, 'v', predictor)
+    clock[0] += 2
+    cache.predict(batch, 'v', predictor)
+    assert predictor.calls == [1, 1]
+    assert cache.stats()['expired'] == 1
+
+def test_new_model_version_invalidates():
+    cache = PredictionCache()
+    batch = pd.DataFrame({'x': [1, 2]})
+    cache.predict(batch, 'v1', CountingPredictor())
+    np.testing.assert_array_equal(cache.predict(batch, 'v2', CountingPredictor(offset=1)), [11, 21])
+    assert cache.stats()['invalidations'] == 1
+
+def test_failed_prediction_is_not_cached():
+    cache, predictor = PredictionCache(), CountingPredictor()
+    batch = pd.DataFrame({'x': [1]})
+    assert cache.predict(batch, 'v', lambda raw: None) is None
+    cache.predict(batch, 'v', predictor)
+    assert predictor.calls == [1]
+
+def test_disk_store_is_shared(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    batch = pd.DataFrame({'x': [1, 2]})
+    PredictionCache(disk_path=path).predict(batch, 'v', CountingPredictor())
+    other, predictor = PredictionCache(disk_path=path), CountingPredictor()
+    np.testing.assert_array_equal(other.predict(batch, 'v', predictor), [10, 20])
+    assert predictor.calls == [] and other.stats()['disk_hits'] == 2
+
+def test_model_version_tracks_registry_and_updates(forest):
+    version = model_version(forest)
+    assert model_version(forest) == version
+    forest.registry_key_ = 'abc'
+    assert model_version(forest) == 'abc'
+    reset_model_version(forest)
+    assert model_version(forest) not in ('abc', version)
@@ -0,0 +1,31 @@
+# tests/test_preprocessing.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import DataPreprocessor, parse_price
+
+@pytest.mark.parametrize('dtype', [object, 'str'])
+def test_parse_price_text_formats(dtype):
+    series = pd.Series(['Rp 4.700.000', 'rp.4.700.000,00', '  1.000 ', None], dtype=dtype)
+    np.testing.assert_array_equal(parse_price(series), [4_700_000, 4_700_000, 1_000, np.nan])
+
+@pytest.mark.parametrize('text', ['-100', 'Rp 1,5 M', 'abc', '1e9'])
+def test_parse_price_rejects_unexpected_formats(text):
+    assert np.isnan(parse_price(pd.Series(['Rp 1.000', text], dtype=object)).iloc[1])
+
+@pytest.mark.parametrize('values', [[1, 2, None], [1.5, 2.0], [1, 2.5, None]])
+def test_parse_price_object_numbers(values):
+    result = parse_price(pd.Series(values, dtype=object))
+    np.testing.assert_array_equal(result, pd.Series(values, dtype='float64'))
+
+def test_parse_price_mixed_object_column():
+    series = pd.Series(['Rp 1.000', 2_500, None, '-5'], index=[10, 11, 12, 13], dtype=object)
+    result = parse_price(series)
+    assert result.index.tolist() == [10, 11, 12, 13]
+    np.testing.assert_array_equal(result, [1_000, 2_500, np.nan, np.nan])
+
+def test_fit_accepts_object_int_price(listings):
+    df = listings.astype({'HARGA': object})
+    processed = DataPreprocessor().fit_transform(df)
+    np.testing.assert_array_equal(processed['harga'], listings['HARGA'].astype('float64'))
@@ -0,0 +1,57 @@
+# tests/test_schema.py
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_listings, write_listings
+from incremental import update_preprocessor_stats
+from schema import ERROR, WARNING, FeatureSchema, SchemaError
+from streaming import fit_preprocessor_chunked
+
+def test_training_data_is_valid(fitted, listings):
+    preprocessor, _ = fitted
+    report = preprocessor.schema_.validate(listings)
+    assert report.is_valid and report.n_invalid == 0 and report.errors.empty
+
+def test_bad_rows_are_rejected_with_codes(fitted, listings):
+    preprocessor, _ = fitted
+    df = listings.head(10).drop(columns='HARGA').astype({'Kondisi': object, 'JKT': object})
+    df.loc[1, 'Kondisi'] = 'Rusak Berat'
+    df.loc[2, 'JKT'] = 'tiga'
+    df.loc[3, 'JKT'] = 2.5
+    df.loc[4, 'Kondisi'] = None
+    df.loc[5, 'Luas Tanah M2'] = 10 ** 7 # Hanya peringatan
+
+    report = preprocessor.schema_.validate(df)
+    assert report.n_invalid == 4
+    np.testing.assert_array_equal(np.flatnonzero(~report.valid_mask), [1, 2, 3, 4])
+    codes = {(row.baris, row.kode, row.tingkat) for row in report.errors.itertuples()}
+    assert codes == {
+        (1, 'kategori_tidak_dikenal', ERROR), (2, 'bukan_angka', ERROR), (3, 'bukan_bilangan_bulat', ERROR),
+        (4, 'kosong', ERROR), (5, 'di_luar_rentang', WARNING),
+    }
+    with pytest.raises(SchemaError) as excinfo:
+        report.raise_if_invalid()
+    assert excinfo.value.report is report
+
+def test_missing_column_invalidates_every_row(fitted, listings):
+    preprocessor, _ = fitted
+    report = preprocessor.schema_.validate(listings.head(5).drop(columns=['HARGA', 'Kondisi']))
+    assert report.missing_columns == ['kondisi']
+    assert not report.valid_mask.any()
+
+def test_streaming_schema_matches_full_schema(tmp_path, listings):
+    path = write_listings(str(tmp_path / 'listings.csv'), 1_000, seed=6)
+    streamed = fit_preprocessor_chunked(path, chunksize=300).schema_
+    full = FeatureSchema.from_dataframe(pd.read_csv(path))
+    assert streamed.columns == full.columns
+
+def test_incremental_update_extends_schema(fitted):
+    preprocessor = copy.deepcopy(fitted[0])
+    new = generate_listings(50, seed=7).astype({'Kondisi': object})
+    new.loc[:9, 'Kondisi'] = 'Rusak Berat'
+    assert preprocessor.schema_.validate(new).n_invalid == 10
+    update_preprocessor_stats(preprocessor, new)
+    assert preprocessor.schema_.validate(new).is_valid
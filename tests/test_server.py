@@ -0,0 +1,20 @@
+# tests/test_server.py
+import numpy as np
+
+from grouped import GroupedModelRouter
+from server import make_predict_fn
+
+def test_predict_fn_pins_models_to_one_thread(fitted, forest, listings):
+    from sklearn.ensemble import RandomForestRegressor
+    preprocessor, processed = fitted
+    columns = preprocessor.feature_columns_
+    forest.set_params(n_jobs=-1)
+    fallback = RandomForestRegressor(n_estimators=5, random_state=0, n_jobs=-1)
+    fallback.fit(processed[columns], processed['harga'])
+    router = GroupedModelRouter('kondisi', {}, fallback, columns)
+
+    records = listings.drop(columns='HARGA').head(3).to_dict('records')
+    for model in (forest, router):
+        predict = make_predict_fn({'preprocessor': preprocessor, 'feature_columns': columns, 'model': model})
+        assert np.isfinite(predict(records)).all()
+    assert forest.n_jobs == 1 and fallback.n_jobs == 1
@@ -0,0 +1,45 @@
+# tests/test_streaming.py
+import numpy as np
+import pytest
+
+from benchmark import write_listings
+from preprocessing import DataPreprocessor, load_data
+from streaming import QuantileSketch, RunningMoments, count_rows, fit_preprocessor_chunked, transform_chunks
+
+@pytest.fixture(scope='module')
+def listings_csv(tmp_path_factory):
+    return write_listings(str(tmp_path_factory.mktemp('streaming') / 'listings.csv'), 2_345, seed=5)
+
+def test_running_moments_match_numpy():
+    values = np.random.default_rng(0).normal(10, 3, 1_000)
+    values[::50] = np.nan
+    stats = RunningMoments()
+    for part in np.array_split(values, 7):
+        stats.update(part)
+    assert stats.n_missing == 20
+    assert stats.mean == pytest.approx(np.nanmean(values))
+    assert stats.var == pytest.approx(np.nanvar(values))
+
+def test_quantile_sketch_rank_error_is_small():
+    values = np.random.default_rng(1).lognormal(5, 1, 50_000)
+    sketch = QuantileSketch(k=200)
+    for part in np.array_split(values, 50):
+        sketch.update(part)
+    for q in (0.1, 0.5, 0.9):
+        rank = (values <= sketch.quantile(q)).mean()
+        assert abs(rank - q) < 0.02
+
+def test_chunked_fit_matches_full_fit(listings_csv):
+    df = load_data(listings_csv, use_cache=False)
+    full = DataPreprocessor().fit(df)
+    chunked = fit_preprocessor_chunked(listings_csv, chunksize=500)
+
+    assert chunked.feature_columns_ == full.feature_columns_
+    assert chunked.categories_ == full.categories_
+    assert chunked.n_samples_ == count_rows(listings_csv, chunksize=500) == len(df)
+    np.testing.assert_allclose(chunked.scaler_.mean_, full.scaler_.mean_, rtol=1e-9)
+    np.testing.assert_allclose(chunked.scaler_.var_, full.scaler_.var_, rtol=1e-9)
+
+    expected = full.transform(df)
+    streamed = np.vstack([chunk.to_numpy() for chunk in transform_chunks(listings_csv, chunked, chunksize=500)])
+    np.testing.assert_allclose(streamed, expected.to_numpy(), rtol=1e-9, atol=1e-9)
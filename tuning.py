@@ -0,0 +1,131 @@
+# tuning.py
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import to_model_input
+
+# Ruang pencarian bawaan untuk RandomForestRegressor
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_leaf': [1, 2, 5],
+    'max_features': [1.0, 0.5, 'sqrt'],
+}
+
+# Data latih milik proses worker (diisi sekali oleh initializer, bukan per kandidat)
+_worker_data = {}
+
+def _init_worker(X, y):
+    _worker_data['X'] = X
+    _worker_data['y'] = y
+
+def _evaluate_candidate(params, n_samples, cv, inner_jobs, random_state):
+    """K-fold CV untuk satu kandidat pada `n_samples` baris pertama (data sudah diacak)."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import r2_score, mean_squared_error
+    from sklearn.model_selection import KFold
+
+    X, y = _worker_data['X'][:n_samples], _worker_data['y'][:n_samples]
+    scores, rmses, fit_times, predict_times = [], [], [], []
+    for train_idx, test_idx in KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X):
+        model = RandomForestRegressor(**params, random_state=random_state, n_jobs=inner_jobs)
+        start = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        fit_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        y_pred = model.predict(X[test_idx])
+        predict_times.append(time.perf_counter() - start)
+        scores.append(r2_score(y[test_idx], y_pred))
+        rmses.append(np.sqrt(mean_squared_error(y[test_idx], y_pred)))
+    return {
+        'mean_r2': float(np.mean(scores)),
+        'std_r2': float(np.std(scores)),
+        'mean_rmse': float(np.mean(rmses)),
+        'mean_fit_time': float(np.mean(fit_times)),
+        'mean_predict_time': float(np.mean(predict_times)),
+    }
+
+def _rung_sizes(n_rows, n_candidates, eta, min_samples):
+    """Jumlah baris per tahap successive halving; tahap terakhir memakai seluruh data."""
+    n_rungs = 1
+    while eta ** n_rungs <= n_candidates:
+        n_rungs += 1
+    sizes = [int(n_rows / eta ** (n_rungs - 1 - rung)) for rung in range(n_rungs)]
+    sizes = [size for size in sizes if size >= min_samples] or [n_rows]
+    sizes[-1] = n_rows
+    return sizes
+
+def tune_regression_model(df, param_grid=None, n_iter=None, cv=5, n_jobs=None, halving=True, eta=3,
+                          min_samples=None, random_state=42, refit=True):
+    """
+    Pencarian hyperparameter RandomForestRegressor dengan K-fold cross-validation.
+
+    - param_grid: dict daftar nilai (default DEFAULT_PARAM_GRID). Dengan n_iter, diambil
+      n_iter kandidat acak (randomized search); tanpa n_iter, seluruh grid dicoba.
+    - n_jobs: anggaran core total (default semua core). Kandidat dijadwalkan di process pool,
+      dan n_jobs tiap forest = anggaran // jumlah worker, sehingga tidak terjadi oversubscription.
+    - halving=True: successive halving; semua kandidat mulai dengan sebagian kecil data, hanya
+      1/eta terbaik per tahap yang lanjut ke tahap berikutnya dengan data eta kali lebih banyak.
+
+    Mengembalikan (model terbaik yang dilatih ulang di seluruh data atau None jika refit=False,
+    parameter terbaik, leaderboard DataFrame berisi skor serta waktu fit/predict tiap kandidat).
+    """
+    if 'harga' not in df.columns:
+        raise KeyError("Kolom 'harga' (target) tidak ditemukan di DataFrame. Tidak bisa melakukan tuning.")
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    param_grid = param_grid or DEFAULT_PARAM_GRID
+    if n_iter is None:
+        candidates = list(ParameterGrid(param_grid))
+    else:
+        candidates = list(ParameterSampler(param_grid, n_iter=n_iter, random_state=random_state))
+
+    # Acak baris sekali; setiap tahap halving memakai prefiks data teracak ini
+    order = np.random.default_rng(random_state).permutation(len(df))
+    X = to_model_input(df.drop(columns=['harga']))[order] # float32 C-contiguous, dtype internal pohon sklearn
+    y = df['harga'].to_numpy(dtype=np.float64)[order]
+
+    core_budget = n_jobs if n_jobs and n_jobs > 0 else (os.cpu_count() or 1)
+    min_samples = min_samples or max(cv * 20, 100)
+    rung_sizes = _rung_sizes(len(X), len(candidates), eta, min_samples) if halving else [len(X)]
+
+    records = []
+    alive = list(range(len(candidates)))
+    outer_workers = max(1, min(core_budget, len(candidates)))
+    with ProcessPoolExecutor(max_workers=outer_workers, initializer=_init_worker, initargs=(X, y)) as executor:
+        for rung, n_samples in enumerate(rung_sizes):
+            # Anggaran core dibagi rata: worker aktif x n_jobs forest <= core_budget
+            inner_jobs = max(1, core_budget // min(outer_workers, len(alive)))
+            futures = {
+                idx: executor.submit(_evaluate_candidate, candidates[idx], n_samples, cv, inner_jobs, random_state)
+                for idx in alive
+            }
+            results = {idx: future.result() for idx, future in futures.items()}
+            for idx, result in results.items():
+                records.append({'candidate': idx, 'rung': rung, 'n_samples': n_samples, **candidates[idx], **result})
+            if rung < len(rung_sizes) - 1:
+                n_keep = max(1, math.ceil(len(alive) / eta))
+                alive = sorted(alive, key=lambda idx: results[idx]['mean_r2'], reverse=True)[:n_keep]
+
+    # Leaderboard: hasil tahap terakhir yang dicapai tiap kandidat
+    leaderboard = (
+        pd.DataFrame(records)
+        .sort_values('rung')
+        .drop_duplicates('candidate', keep='last')
+        .sort_values(['rung', 'mean_r2'], ascending=[False, False])
+        .reset_index(drop=True)
+    )
+    best_params = candidates[int(leaderboard.loc[0, 'candidate'])]
+
+    best_model = None
+    if refit:
+        best_model = RandomForestRegressor(**best_params, random_state=random_state, n_jobs=core_budget)
+        best_model.fit(to_model_input(df.drop(columns=['harga'])), df['harga'].to_numpy())
+    return best_model, best_params, leaderboard
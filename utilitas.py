@@ -1,35 +1,62 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import pandas as pd
 import numpy as np
-import streamlit as st
+
+from plotting import downsample_indices, hash_data, new_figure, render_image
+from reporting import report_warning
+
+def _feature_importance_frame(model, feature_names):
+    feature_importance_df = pd.DataFrame({'Feature': list(feature_names), 'Importance': model.feature_importances_})
+    return feature_importance_df.sort_values(by='Importance', ascending=False)
+
+def _draw_feature_importance(fig, feature_importance_df):
+    import seaborn as sns
+    ax = fig.subplots()
+    sns.barplot(x='Importance', y='Feature', data=feature_importance_df, ax=ax)
+    ax.set_title('Feature Importance')
+    ax.set_xlabel('Importance')
+    ax.set_ylabel('Feature')
+    fig.tight_layout()
+
+def _draw_residuals(fig, y_test, y_pred):
+    import seaborn as sns
+    y_test, y_pred = np.asarray(y_test), np.asarray(y_pred)
+    residuals = y_test - y_pred
+    # Scatter plot data uji yang besar cukup digambar dari sampel
+    sample = downsample_indices(len(y_pred))
+    if sample is not None:
+        y_pred, residuals = y_pred[sample], residuals[sample]
+    ax = fig.subplots()
+    sns.scatterplot(x=y_pred, y=residuals, ax=ax, alpha=0.6)
+    ax.axhline(y=0, color='r', linestyle='--', linewidth=2)
+    ax.set_title('Residual Plot (Aktual vs Prediksi)')
+    ax.set_xlabel('Nilai Prediksi')
+    ax.set_ylabel('Residual (Aktual - Prediksi)')
+    fig.tight_layout()
 
 def plot_feature_importance(model, feature_names):
     """Membuat bar plot untuk feature importance dari model berbasis tree."""
     if hasattr(model, 'feature_importances_'):
-        importances = model.feature_importances_
-        feature_importance_df = pd.DataFrame({'Feature': feature_names, 'Importance': importances})
-        feature_importance_df = feature_importance_df.sort_values(by='Importance', ascending=False)
-
-        fig, ax = plt.subplots(figsize=(12, 7))
-        sns.barplot(x='Importance', y='Feature', data=feature_importance_df, ax=ax)
-        ax.set_title('Feature Importance')
-        ax.set_xlabel('Importance')
-        ax.set_ylabel('Feature')
-        plt.tight_layout()
+        fig = new_figure(figsize=(12, 7))
+        _draw_feature_importance(fig, _feature_importance_frame(model, feature_names))
         return fig
     else:
-        st.warning("Model yang diberikan tidak memiliki atribut 'feature_importances_'. Visualisasi ini hanya untuk model berbasis tree.")
+        report_warning("Model yang diberikan tidak memiliki atribut 'feature_importances_'. Visualisasi ini hanya untuk model berbasis tree.")
         return None
 
 def plot_residuals(y_test, y_pred):
     """Membuat scatter plot untuk residual (aktual vs prediksi)."""
-    residuals = y_test - y_pred
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(x=y_pred, y=residuals, ax=ax, alpha=0.6)
-    ax.axhline(y=0, color='r', linestyle='--', linewidth=2)
-    ax.set_title('Residual Plot (Aktual vs Prediksi)')
-    ax.set_xlabel('Nilai Prediksi')
-    ax.set_ylabel('Residual (Aktual - Prediksi)')
-    plt.tight_layout()
-    return fig
\ No newline at end of file
+    fig = new_figure(figsize=(10, 6))
+    _draw_residuals(fig, y_test, y_pred)
+    return fig
+
+def render_feature_importance(model, feature_names):
+    """Seperti plot_feature_importance, tetapi dirender di render pool dan dikembalikan sebagai bytes PNG (di-cache)."""
+    if not hasattr(model, 'feature_importances_'):
+        return plot_feature_importance(model, feature_names)
+    feature_importance_df = _feature_importance_frame(model, feature_names)
+    return render_image(_draw_feature_importance, feature_importance_df, figsize=(12, 7), cache_key=hash_data(feature_importance_df))
+
+def render_residuals(y_test, y_pred):
+    """Seperti plot_residuals, tetapi dirender di render pool dan dikembalikan sebagai bytes PNG (di-cache)."""
+    y_test, y_pred = np.asarray(y_test), np.asarray(y_pred)
+    return render_image(_draw_residuals, y_test, y_pred, figsize=(10, 6), cache_key=hash_data(y_test, y_pred))